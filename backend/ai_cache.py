@@ -0,0 +1,103 @@
+"""
+AI Response Cache Module for JobTracker
+Size-bounded LRU of finished AI assistant responses with per-tool TTLs
+"""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, List
+
+
+def prompt_hash(tool_id: str, model: str, prompt: str) -> str:
+    """
+    Cache key for a prompt - case and whitespace differences map to the same key
+
+    Args:
+        tool_id: AI tool the prompt was built for
+        model: Gemini model that answers it
+        prompt: Full prompt text (system prompt, history and message)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    normalized = " ".join(prompt.lower().split())
+    return hashlib.sha256(f"{tool_id}\n{model}\n{normalized}".encode('utf-8')).hexdigest()
+
+
+class CachedResponse:
+    """Streamed chunks of one finished response, replayed on a hit"""
+
+    def __init__(self, chunks: List[str], tokens: int, expires_at: float):
+        self.chunks = chunks
+        self.tokens = tokens
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """Thread-safe LRU of AI responses; entries expire after their tool's TTL"""
+
+    def __init__(self, max_entries: int, ttl_seconds: Dict[str, int]):
+        """
+        Initialize response cache
+
+        Args:
+            max_entries: Maximum responses held before the least recently used is evicted
+            ttl_seconds: Seconds a response stays valid, per tool_id (tools missing or 0 aren't cached)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cacheable(self, tool_id: str) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds.get(tool_id, 0) > 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Fresh entry for `key`, or None (expired entries are dropped)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_tokens += entry.tokens
+            return entry
+
+    def put(self, key: str, tool_id: str, chunks: List[str], tokens: int):
+        """Store a finished response for its tool's TTL"""
+        ttl = self.ttl_seconds.get(tool_id, 0)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = CachedResponse(chunks, tokens, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and tokens saved since startup"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "saved_tokens": self.saved_tokens,
+                "entries": len(self._entries),
+                "evictions": self.evictions,
+                "ttl_seconds": dict(self.ttl_seconds)
+            }
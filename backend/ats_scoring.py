@@ -0,0 +1,153 @@
+"""
+ATS Scoring Module for JobTracker
+Scores resume content with Gemini on a bounded worker pool, one call per distinct content
+"""
+
+import json
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Tuple
+
+ATS_MODEL = "gemini-3-flash-preview"
+
+ATS_PROMPT = """You are an ATS (Applicant Tracking System) analyzer. Analyze this resume and provide:
+1. An ATS compatibility score from 0-100
+2. Brief feedback on what makes it ATS-friendly or not
+
+Consider:
+- Keyword optimization
+- Formatting (simple structure, no complex tables/graphics)
+- Standard section headings (Experience, Education, Skills)
+- Quantifiable achievements
+- Industry-specific keywords
+- Contact information clarity
+
+Resume Content:
+{content}
+
+Respond in this exact JSON format:
+{{
+  "score": <number between 0-100>,
+  "feedback": "<2-3 sentence summary>"
+}}
+"""
+
+
+def resume_content_hash(content: str) -> str:
+    """
+    Hash resume text with whitespace collapsed, so re-extracted copies of a file match
+
+    Args:
+        content: Resume text
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    normalized = " ".join((content or "").split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def parse_ats_response(text: str) -> Dict:
+    """
+    Parse Gemini's JSON reply, with or without a markdown code fence
+
+    Args:
+        text: Raw response text
+
+    Returns:
+        Dict with score and feedback
+
+    Raises:
+        json.JSONDecodeError: If the reply isn't valid JSON
+    """
+    text = text.strip()
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0].strip()
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0].strip()
+
+    result = json.loads(text)
+    return {"score": result.get("score", 0), "feedback": result.get("feedback", "")}
+
+
+class AtsScorer:
+    """Runs ATS analyses on worker threads; one user's identical content in flight shares one call"""
+
+    def __init__(self, gemini_client, max_workers: int = 2):
+        """
+        Initialize ATS scorer
+
+        Args:
+            gemini_client: google-genai Client
+            max_workers: Number of Gemini calls allowed at once
+        """
+        self.gemini_client = gemini_client
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="ats-score"
+        )
+        self.llm_calls = 0
+        self._in_flight: Dict[Tuple[int, str], Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, user_id: int, content_hash: str, content: str) -> Future:
+        """
+        Score content, or join the user's analysis of the same content already running
+
+        Args:
+            user_id: User the resume belongs to - analyses are never shared between users
+            content_hash: resume_content_hash(content)
+            content: Resume text
+
+        Returns:
+            Future resolving to {"score", "feedback"}
+        """
+        key = (user_id, content_hash)
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future
+            future = self.executor.submit(self._score, content)
+            self._in_flight[key] = future
+
+        # Outside the lock - the callback runs right away if the analysis already finished
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting analyses and release worker threads"""
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _score(self, content: str) -> Dict:
+        with self._lock:
+            self.llm_calls += 1
+
+        response = self.gemini_client.models.generate_content(
+            model=ATS_MODEL,
+            contents=ATS_PROMPT.format(content=content),
+            config={
+                "temperature": 0.2,
+                "max_output_tokens": 1000
+            }
+        )
+        return parse_ats_response(response.text)
+
+    def _forget(self, key: Tuple[int, str]):
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+
+# Convenience function for easy import
+def create_ats_scorer(gemini_client, max_workers: int = 2) -> AtsScorer:
+    """
+    Create an AtsScorer instance
+
+    Args:
+        gemini_client: google-genai Client
+        max_workers: Number of Gemini calls allowed at once
+
+    Returns:
+        AtsScorer instance
+    """
+    return AtsScorer(gemini_client, max_workers=max_workers)
@@ -0,0 +1,137 @@
+"""
+Database Layer Benchmark for JobTracker
+Compares requests/sec of the sync (threadpool) and async database paths
+serving the same application list query under concurrent clients
+
+Both paths run the query the list route runs, against DATABASE_URL and with
+the same DB_POOL_* settings, served by uvicorn in a child process. On
+PostgreSQL --latency-ms adds a pg_sleep per request to stand in for the
+round trip to a remote database.
+
+Usage:
+    python benchmarks/db_layer_benchmark.py [--clients 50 100 200] [--requests 1000] [--latency-ms 20]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import multiprocessing
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Depends
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from main import (
+    engine, Base, SessionLocal, Application, DEMO_USER_ID, DEFAULT_PAGE_SIZE,
+    get_async_db, AsyncSession
+)
+
+
+def get_sync_db():
+    """Sync session dependency for the threadpool route (the API itself only uses get_async_db)"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def list_query():
+    return select(Application).where(
+        Application.user_id == DEMO_USER_ID
+    ).order_by(Application.created_at.desc(), Application.id.desc()).limit(DEFAULT_PAGE_SIZE)
+
+
+def build_app(latency: float) -> FastAPI:
+    """App with the same query behind a sync route and an async route"""
+    bench = FastAPI()
+    sleep = text("SELECT pg_sleep(:seconds)") if latency and engine.dialect.name == "postgresql" else None
+
+    @bench.get("/sync")
+    def sync_route(db: Session = Depends(get_sync_db)):
+        if sleep is not None:
+            db.execute(sleep, {"seconds": latency})
+        return len(db.scalars(list_query()).all())
+
+    @bench.get("/async")
+    async def async_route(db: AsyncSession = Depends(get_async_db)):
+        if sleep is not None:
+            await db.execute(sleep, {"seconds": latency})
+        return len((await db.scalars(list_query())).all())
+
+    return bench
+
+
+def serve(port: int, latency: float):
+    uvicorn.run(build_app(latency), host="127.0.0.1", port=port, log_level="warning")
+
+
+async def run_load(client: httpx.AsyncClient, path: str, clients: int, requests: int):
+    """Send `requests` requests from `clients` concurrent clients; returns (req/sec, p50 ms, p95 ms, errors)"""
+    remaining = iter(range(requests))
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(clients)])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return requests / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1], errors
+
+
+async def main(clients_levels, requests: int, latency: float, port: int):
+    Base.metadata.create_all(bind=engine)
+    server = multiprocessing.get_context("spawn").Process(target=serve, args=(port, latency), daemon=True)
+    server.start()
+    client = httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{port}",
+        limits=httpx.Limits(max_connections=max(clients_levels)),
+        timeout=None
+    )
+    for _ in range(100):
+        try:
+            await client.get("/docs")
+            break
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+
+    print(f"🗄️  {engine.dialect.name}, {requests} requests per run"
+          + (f", {latency * 1000:.0f} ms simulated latency" if latency and engine.dialect.name == "postgresql" else ""))
+    for path in ("/sync", "/async"):
+        await client.get(path)  # warm up the pool
+
+    for clients in clients_levels:
+        for path in ("/sync", "/async"):
+            rate, p50, p95, errors = await run_load(client, path, clients, requests)
+            print(f"⚡ {path:<6} {clients:>4} clients: {rate:8,.0f} req/sec  p50 {p50:7.1f} ms  p95 {p95:7.1f} ms"
+                  + (f"  ❌ {errors} errors" if errors else ""))
+
+    await client.aclose()
+    server.terminate()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 100, 200], help="Concurrent client counts")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per run")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Simulated per-request database latency (PostgreSQL only)")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.clients, args.requests, args.latency_ms / 1000, args.port))
@@ -0,0 +1,90 @@
+"""
+Keyword Parser Benchmark for JobTracker
+Measures parse_email_with_keywords throughput (emails/sec) over a synthetic corpus
+
+Usage:
+    python benchmarks/keyword_parser_benchmark.py [--emails 5000] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from email_sync import EmailSyncService, EMAIL_MATCHER
+
+COMPANIES = ["Google", "Stripe", "Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Pied Piper"]
+POSITIONS = ["Software Engineer", "Data Analyst", "Product Manager", "DevOps Engineer", "ML Engineer", "UI/UX Designer"]
+
+JOB_TEMPLATES = [
+    ("Thank you for applying to {company}", "Hi,\nThank you for applying to the {position} position. We have received your application and the {company} Recruiting team will review it."),
+    ("{company} - Online Assessment", "Hello,\nAs the next step for the {position} role, please complete the following coding challenge within 5 days.\n{company} Talent"),
+    ("Interview invitation: {position}", "Hi there,\nWe would like to schedule a phone screen for the {position} role at {company}. Please pick a time for a video call."),
+    ("Update on your application", "Dear candidate,\nUnfortunately we have decided not to move forward with your application for {position}.\n{company} Careers"),
+]
+
+OTHER_TEMPLATES = [
+    ("Your weekly digest", "Here are the top stories this week from your network. Read more about the latest product launches and events near you."),
+    ("Order confirmation #{number}", "Thanks for your order! Your package will arrive in 3-5 business days. Track your shipment online."),
+    ("Team lunch on Friday", "Hey all, we are planning lunch on Friday. Reply with your preferences by Wednesday."),
+]
+
+FILLER = (
+    "This message and any attachments are confidential and intended solely for the addressee. "
+    "If you received this email in error please notify the sender and delete it. "
+)
+
+
+def build_corpus(size: int, seed: int = 42):
+    """Build (subject, body) pairs: about half job-related, half unrelated"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        templates = JOB_TEMPLATES if rng.random() < 0.5 else OTHER_TEMPLATES
+        subject, body = rng.choice(templates)
+        values = {
+            "company": rng.choice(COMPANIES),
+            "position": rng.choice(POSITIONS),
+            "number": i
+        }
+        # Pad to a realistic body length (the parser sees at most 2000 chars)
+        body = body.format(**values) + "\n\n" + FILLER * rng.randint(3, 12)
+        corpus.append((subject.format(**values), body[:2000]))
+    return corpus
+
+
+def measure(func, corpus, repeat: int) -> float:
+    """Best emails/sec over `repeat` runs"""
+    best = 0.0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for subject, body in corpus:
+            func(subject, body)
+        elapsed = time.perf_counter() - started
+        best = max(best, len(corpus) / elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--emails", type=int, default=5000, help="Synthetic emails in the corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.emails)
+    service = EmailSyncService()
+
+    matched = sum(1 for subject, body in corpus if service.parse_email_with_keywords(body, subject))
+    keyword_rate = measure(lambda subject, body: EMAIL_MATCHER.match((subject + " " + body).lower()), corpus, args.repeat)
+    parse_rate = measure(lambda subject, body: service.parse_email_with_keywords(body, subject), corpus, args.repeat)
+
+    print(f"📧 Corpus: {len(corpus)} emails ({matched} job-related)")
+    print(f"⚡ Keyword matching:    {keyword_rate:,.0f} emails/sec")
+    print(f"⚡ Full keyword parse:  {parse_rate:,.0f} emails/sec")
+
+
+if __name__ == "__main__":
+    main()
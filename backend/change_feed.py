@@ -0,0 +1,305 @@
+"""
+Change Feed Module for JobTracker
+Pushes collection changes to Server-Sent Event streams - in process, or across workers via PostgreSQL LISTEN/NOTIFY
+"""
+
+import os
+import json
+import uuid
+import asyncio
+from collections import deque
+from datetime import datetime
+from typing import Optional, Dict, List, Set, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+CHANGE_CHANNEL = "jobtracker_changes"
+EVENT_BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER_SIZE", "1000"))        # Recent events kept for Last-Event-ID resume
+EVENT_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))           # Undelivered events per stream before it resyncs
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+LISTEN_RETRY_SECONDS = 5
+CLIENT_RETRY_MS = 3000
+
+# Session.info key for changes waiting on their transaction to commit
+PENDING_CHANGES = "pending_changes"
+
+# Tells the client events were lost - refetch everything it shows
+RESYNC = "resync"
+
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class ChangeEvent:
+    """One change pushed to a user's streams"""
+
+    def __init__(self, event_id: str, seq: int, user_id: int, kind: str, data: Dict):
+        self.event_id = event_id
+        self.seq = seq
+        self.user_id = user_id
+        self.kind = kind
+        self.data = data
+
+    def to_sse(self) -> str:
+        return f"id: {self.event_id}\nevent: {self.kind}\ndata: {json.dumps(self.data, default=json_default)}\n\n"
+
+
+class Subscription:
+    """One open stream's bounded queue - on overflow it is cleared and replaced by a single resync"""
+
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.queue: "asyncio.Queue[ChangeEvent]" = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def offer(self, change: ChangeEvent) -> bool:
+        """Queue an event without waiting (returns False if the stream fell behind)"""
+        if self.overflowed:
+            return False
+        try:
+            self.queue.put_nowait(change)
+            return True
+        except asyncio.QueueFull:
+            # A slow consumer gets one resync instead of an unbounded backlog
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(ChangeEvent(change.event_id, change.seq, self.user_id, RESYNC, {"reason": "overflow"}))
+            self.overflowed = True
+            return False
+
+
+class ChangeBus:
+    """Fans change events out to SSE subscribers; relays PostgreSQL notifications when listening"""
+
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE, queue_size: int = EVENT_QUEUE_SIZE,
+                 heartbeat_seconds: float = EVENT_HEARTBEAT_SECONDS):
+        """
+        Initialize change bus
+
+        Args:
+            buffer_size: Recent events kept for clients resuming with Last-Event-ID
+            queue_size: Events queued per stream before a slow client is resynced
+            heartbeat_seconds: Idle seconds before a stream sends a keep-alive comment
+        """
+        self.buffer_size = buffer_size
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        # Event IDs are only meaningful to this process - a restart or another worker means resync
+        self.epoch = uuid.uuid4().hex[:8]
+        self.published = 0
+        self.overflows = 0
+        self.listening = False
+        self._seq = 0
+        self._buffer: "deque[ChangeEvent]" = deque(maxlen=buffer_size)
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self, async_engine=None):
+        """
+        Start delivering events on the running loop
+
+        Args:
+            async_engine: SQLAlchemy async engine; on PostgreSQL the bus LISTENs for other workers' changes
+        """
+        self._loop = asyncio.get_running_loop()
+        if async_engine is not None and async_engine.dialect.name == "postgresql":
+            self._listener = self._loop.create_task(self._listen(async_engine))
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        self.listening = False
+
+    def publish(self, user_id: int, kind: str, data: Optional[Dict] = None):
+        """Deliver an event to this process's streams (safe to call from any thread)"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._deliver, user_id, kind, data or {})
+
+    def broadcast(self, connectable, user_id: int, kind: str, data: Dict):
+        """
+        Deliver an event to every worker's streams, for events no transaction carries
+
+        Goes through pg_notify while the bus LISTENs on PostgreSQL, straight to this
+        process's streams otherwise. Blocks on the database - call it off the event loop.
+
+        Args:
+            connectable: Sync engine the notification is sent on
+            user_id: User whose streams receive the event
+            kind: Event name
+            data: Event body (JSON-serializable, datetimes allowed)
+        """
+        if not self.listening:
+            self.publish(user_id, kind, data)
+            return
+        with connectable.begin() as connection:
+            connection.execute(notify_statement(user_id, kind, None, data))
+
+    def record(self, session: Session, user_id: int, collection: str, version: Optional[int]):
+        """Publish a collection change once `session`'s transaction commits (dropped on rollback)"""
+        session.info.setdefault(PENDING_CHANGES, []).append((user_id, collection, version))
+
+    def subscribe(self, user_id: int, last_event_id: Optional[str] = None) -> Tuple[Subscription, List[ChangeEvent]]:
+        """
+        Open a subscription, with the events missed since `last_event_id`
+
+        Args:
+            user_id: User whose changes the stream receives
+            last_event_id: Last-Event-ID the client reconnected with
+
+        Returns:
+            (subscription, events to send first) - a single resync if the gap can't be replayed
+        """
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription, self._missed(user_id, last_event_id) if last_event_id else []
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+
+    async def stream(self, user_id: int, last_event_id: Optional[str] = None):
+        """
+        SSE body for one client - events as they happen, heartbeats while idle
+
+        Waits on its queue only, so an idle stream costs no database queries.
+        """
+        subscription, backlog = self.subscribe(user_id, last_event_id)
+        try:
+            yield f"retry: {CLIENT_RETRY_MS}\n\n"
+            for change in backlog:
+                yield change.to_sse()
+            while True:
+                try:
+                    change = await asyncio.wait_for(subscription.queue.get(), timeout=self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                if change.kind == RESYNC:
+                    subscription.overflowed = False
+                yield change.to_sse()
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> Dict:
+        return {
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "published": self.published,
+            "overflows": self.overflows,
+            "buffered": len(self._buffer),
+            "listening": self.listening
+        }
+
+    def _deliver(self, user_id: int, kind: str, data: Dict):
+        # Runs on the loop thread only, so sequence numbers and subscriber sets need no lock
+        self._seq += 1
+        change = ChangeEvent(f"{self.epoch}-{self._seq}", self._seq, user_id, kind, data)
+        if kind != RESYNC:
+            self._buffer.append(change)
+        self.published += 1
+        for subscription in list(self._subscribers.get(user_id, ())):
+            if not subscription.offer(change):
+                self.overflows += 1
+
+    def _missed(self, user_id: int, last_event_id: str) -> List[ChangeEvent]:
+        epoch, _, seq = last_event_id.partition("-")
+        oldest = self._buffer[0].seq if self._buffer else self._seq + 1
+        if epoch != self.epoch or not seq.isdigit() or int(seq) < oldest - 1 or int(seq) > self._seq:
+            return [ChangeEvent(f"{self.epoch}-{self._seq}", self._seq, user_id, RESYNC, {"reason": "gap"})]
+        return [change for change in self._buffer if change.seq > int(seq) and change.user_id == user_id]
+
+    def _resync_all(self, reason: str):
+        for user_id in list(self._subscribers):
+            self._deliver(user_id, RESYNC, {"reason": reason})
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            message = json.loads(payload)
+            data = message["data"] if "data" in message else {"version": message.get("version")}
+            self._deliver(message["user_id"], message["collection"], data)
+        except (ValueError, KeyError) as e:
+            print(f"Ignoring malformed change notification: {e}")
+
+    async def _listen(self, async_engine):
+        # One dedicated connection per worker; notifications missed while it's down trigger a resync
+        while True:
+            connection = None
+            try:
+                connection = await async_engine.connect()
+                raw = (await connection.get_raw_connection()).driver_connection
+                closed = asyncio.Event()
+                raw.add_termination_listener(lambda _: closed.set())
+                await raw.add_listener(CHANGE_CHANNEL, self._on_notify)
+                if not self.listening:
+                    print(f"✅ Listening for changes on '{CHANGE_CHANNEL}'")
+                self.listening = True
+                await closed.wait()
+                print("⚠️  Change listener connection lost - reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Change listener failed: {e}")
+            finally:
+                if connection is not None:
+                    try:
+                        await asyncio.shield(connection.close())
+                    except Exception:
+                        pass
+                if self.listening:
+                    self.listening = False
+                    self._resync_all("listener_reconnect")
+            await asyncio.sleep(LISTEN_RETRY_SECONDS)
+
+
+def notify_statement(user_id: int, collection: str, version: Optional[int], data: Optional[Dict] = None):
+    """pg_notify for a collection change (or an event with its own body) - PostgreSQL delivers it when the transaction commits"""
+    message = {"user_id": user_id, "collection": collection, "version": version}
+    if data is not None:
+        message["data"] = data
+    payload = json.dumps(message, default=json_default)
+    return select(func.pg_notify(CHANGE_CHANNEL, payload))
+
+
+def track_commits(bus: ChangeBus):
+    """
+    Publish changes recorded on any Session once its transaction commits
+
+    While the bus LISTENs on PostgreSQL the notifications already reach every
+    worker (this one included), so only the local fallback publishes here.
+    """
+    @event.listens_for(Session, "after_commit")
+    def publish_pending(session):
+        for user_id, collection, version in session.info.pop(PENDING_CHANGES, []):
+            if not bus.listening:
+                bus.publish(user_id, collection, {"version": version})
+
+    @event.listens_for(Session, "after_transaction_end")
+    def discard_pending(session, transaction):
+        if transaction.parent is None:
+            session.info.pop(PENDING_CHANGES, None)
+
+
+# Convenience function for easy import
+def create_change_bus() -> ChangeBus:
+    """
+    Create a ChangeBus publishing committed changes
+
+    Returns:
+        ChangeBus instance
+    """
+    bus = ChangeBus()
+    track_commits(bus)
+    return bus
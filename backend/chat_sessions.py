@@ -0,0 +1,226 @@
+"""
+Chat Session Module for JobTracker
+Server-side AI assistant conversations with Gemini context caches for their stable prefix
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, List, Tuple
+
+from rate_limiter import estimate_tokens
+
+# Session store limits
+CHAT_SESSION_MAX = int(os.getenv("CHAT_SESSION_MAX", "1000"))
+CHAT_SESSION_IDLE_SECONDS = int(os.getenv("CHAT_SESSION_IDLE_SECONDS", "1800"))
+CHAT_SESSION_MAX_TURNS = 60  # Stored turns per session; older ones live on in the rolling summary
+
+# Gemini rejects context caches below a model-specific minimum size
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "4096"))
+# Re-cache once this many tokens have piled up after the cached prefix (each cache write costs a full read)
+CONTEXT_CACHE_REFRESH_TOKENS = int(os.getenv("GEMINI_CONTEXT_CACHE_REFRESH_TOKENS", "2048"))
+
+
+def to_gemini_contents(turns: List[Dict]) -> List[Dict]:
+    """Chat turns as Gemini contents (the assistant speaks as "model")"""
+    return [
+        {"role": "user" if turn["role"] == "user" else "model", "parts": [{"text": turn["content"]}]}
+        for turn in turns
+    ]
+
+
+def prefix_fingerprint(system_instruction: str, turns: List[Dict]) -> str:
+    digest = hashlib.sha256(system_instruction.encode('utf-8'))
+    for turn in turns:
+        digest.update(f"\0{turn['role']}\0{turn['content']}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ChatSession:
+    """One conversation with one AI tool"""
+
+    def __init__(self, user_id: int, tool_id: str, model: str, turns: Optional[List[Dict]] = None):
+        self.session_id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.tool_id = tool_id
+        self.model = model
+        # Client-supplied history is untrusted - keep only well-formed text turns
+        self.turns: List[Dict] = [
+            {"role": "user" if turn.get("role") == "user" else "assistant", "content": str(turn["content"])}
+            for turn in (turns or []) if isinstance(turn, dict) and turn.get("content")
+        ][-CHAT_SESSION_MAX_TURNS:]
+        self.last_used = time.monotonic()
+
+        # Gemini cache holding system instruction + the first cached_turns turns
+        self.cache_name: Optional[str] = None
+        self.cache_fingerprint: Optional[str] = None
+        self.cached_turns = 0
+        self.cache_expires_at = 0.0
+        self.cache_refreshing = False
+
+    def add_exchange(self, message: str, reply: str):
+        self.turns.append({"role": "user", "content": message})
+        self.turns.append({"role": "assistant", "content": reply})
+        del self.turns[:-CHAT_SESSION_MAX_TURNS]
+
+    def cached_prefix(self, system_instruction: str, turns: List[Dict]) -> Tuple[Optional[str], List[Dict]]:
+        """
+        Context cache usable for this prompt, and the turns still to send
+
+        Args:
+            system_instruction: System instruction the prompt uses
+            turns: Turns the prompt includes, oldest first
+
+        Returns:
+            (cache name or None, turns not covered by the cache)
+        """
+        count = self.cached_turns
+        # A minute's margin, so the cache can't expire between this check and Gemini reading it
+        if self.cache_name and count <= len(turns) and self.cache_expires_at - 60 > time.monotonic() and \
+                prefix_fingerprint(system_instruction, turns[:count]) == self.cache_fingerprint:
+            return self.cache_name, turns[count:]
+        return None, turns
+
+
+class ChatSessionStore:
+    """Thread-safe LRU of chat sessions; idle sessions are evicted with their Gemini caches"""
+
+    def __init__(self, gemini_client=None, max_sessions: int = CHAT_SESSION_MAX,
+                 idle_seconds: int = CHAT_SESSION_IDLE_SECONDS):
+        """
+        Initialize session store
+
+        Args:
+            gemini_client: google-genai Client, for context caches (None = no caching)
+            max_sessions: Sessions kept before the least recently used is evicted
+            idle_seconds: Sessions unused this long are evicted
+        """
+        self.gemini_client = gemini_client
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.caches_created = 0
+        self.cached_requests = 0
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._tasks = set()
+        self._lock = threading.Lock()
+
+    def create(self, user_id: int, tool_id: str, model: str, turns: Optional[List[Dict]] = None) -> ChatSession:
+        session = ChatSession(user_id, tool_id, model, turns)
+        with self._lock:
+            self._sessions[session.session_id] = session
+            evicted = self._evict()
+        self._drop_caches(evicted)
+        return session
+
+    def get(self, session_id: str, user_id: int) -> Optional[ChatSession]:
+        """Live session by ID (None if unknown, evicted or another user's)"""
+        with self._lock:
+            evicted = self._evict()
+            session = self._sessions.get(session_id)
+            if session and session.user_id == user_id:
+                session.last_used = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            else:
+                session = None
+        self._drop_caches(evicted)
+        return session
+
+    def delete(self, session_id: str, user_id: int) -> bool:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if not session or session.user_id != user_id:
+                return False
+            del self._sessions[session_id]
+        self._drop_caches([session])
+        return True
+
+    def refresh_cache(self, session: ChatSession, system_instruction: str, turns: List[Dict]):
+        """
+        Cache system instruction + turns for the session's next requests, in the background
+
+        Skipped when the prefix is below Gemini's minimum cache size, or when the current
+        cache still covers all but CONTEXT_CACHE_REFRESH_TOKENS of it.
+        """
+        if not self.gemini_client or session.cache_refreshing:
+            return
+        if estimate_tokens(system_instruction) + sum(estimate_tokens(t["content"]) for t in turns) < CONTEXT_CACHE_MIN_TOKENS:
+            return
+        cache_name, uncached = session.cached_prefix(system_instruction, turns)
+        if cache_name and sum(estimate_tokens(t["content"]) for t in uncached) < CONTEXT_CACHE_REFRESH_TOKENS:
+            return
+        fingerprint = prefix_fingerprint(system_instruction, turns)
+
+        session.cache_refreshing = True
+        self._spawn(self._create_cache(session, system_instruction, turns, fingerprint))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "context_caches": sum(1 for s in self._sessions.values() if s.cache_name),
+                "caches_created": self.caches_created,
+                "cached_requests": self.cached_requests
+            }
+
+    async def _create_cache(self, session: ChatSession, system_instruction: str, turns: List[Dict], fingerprint: str):
+        old_name = session.cache_name
+        try:
+            cache = await self.gemini_client.aio.caches.create(
+                model=session.model,
+                config={
+                    "system_instruction": system_instruction,
+                    "contents": to_gemini_contents(turns),
+                    "ttl": f"{self.idle_seconds}s",
+                    "display_name": f"chat-{session.session_id[:12]}"
+                }
+            )
+            session.cache_name = cache.name
+            session.cache_fingerprint = fingerprint
+            session.cached_turns = len(turns)
+            session.cache_expires_at = time.monotonic() + self.idle_seconds
+            with self._lock:
+                self.caches_created += 1
+            if old_name:
+                await self._delete_cache(old_name)
+        except Exception as e:
+            print(f"Context cache for chat {session.session_id[:8]} failed: {e}")
+        finally:
+            session.cache_refreshing = False
+
+    async def _delete_cache(self, name: str):
+        try:
+            await self.gemini_client.aio.caches.delete(name=name)
+        except Exception as e:
+            # Expires on its own via the TTL
+            print(f"Deleting context cache {name} failed: {e}")
+
+    def _drop_caches(self, sessions: List[ChatSession]):
+        for session in sessions:
+            if session.cache_name and self.gemini_client:
+                self._spawn(self._delete_cache(session.cache_name))
+
+    def _spawn(self, coro):
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return
+        # Keep a reference until done, so the task isn't garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _evict(self) -> List[ChatSession]:
+        # Idle sessions first, then the least recently used beyond the limit (caller holds the lock)
+        cutoff = time.monotonic() - self.idle_seconds
+        evicted = []
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_used >= cutoff and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+            evicted.append(session)
+        return evicted
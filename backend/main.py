@@ -1,18 +1,33 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse 
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, ForeignKey
-from sqlalchemy.orm import sessionmaker, Session, relationship, DeclarativeBase
+from sqlalchemy import create_engine, make_url, Column, Integer, String, Boolean, DateTime, ForeignKey, Index, tuple_, func, select, update, delete, case, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import sessionmaker, Session, relationship, DeclarativeBase, load_only
+from sqlalchemy.types import TypeDecorator
 from pydantic import BaseModel, ConfigDict
-from typing import Optional, List
-from datetime import datetime
+from typing import Optional, List, Tuple
+from datetime import datetime, time, timedelta
 from contextlib import asynccontextmanager
+from collections import deque, OrderedDict
+from time import perf_counter
 import os
 from dotenv import load_dotenv
 from google import genai
 import json
-import PyPDF2
-import io
+import base64
+import hashlib
+import asyncio
+import anyio
+from concurrent.futures import as_completed
+
+from migrations import run_migrations
+from ai_cache import ResponseCache, prompt_hash
+from prompt_builder import PromptBuilder
+from chat_sessions import ChatSessionStore, CHAT_SESSION_MAX_TURNS, to_gemini_contents
+from rate_limiter import estimate_tokens
 
 load_dotenv()
 
@@ -38,23 +53,90 @@ if GEMINI_API_KEY:
 else:
     print("⚠️  Email sync disabled - GEMINI_API_KEY required")
 
-# Create engine with Supabase-specific settings
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    connect_args={
-        "connect_timeout": 10,
-        "sslmode": "require"
+# ✅ Change feed - committed writes and sync job updates pushed to /api/events streams
+from change_feed import create_change_bus, notify_statement
+change_bus = create_change_bus()
+
+# ✅ ATS scoring - Gemini calls on a bounded pool, batch jobs queued off the request path
+from ats_scoring import create_ats_scorer, resume_content_hash
+from text_compression import compress_text, decompress_text
+ats_scorer = create_ats_scorer(client, max_workers=int(os.getenv("ATS_WORKERS", "2"))) if GEMINI_API_KEY else None
+
+# ✅ PDF text extraction on worker processes, cached by file hash
+from pdf_extraction import create_pdf_text_extractor, spool_upload, UploadTooLarge
+pdf_text_extractor = create_pdf_text_extractor(max_workers=int(os.getenv("PDF_WORKERS", "2")))
+
+# Connection pool settings (per engine, per worker process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300"))
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+# Supabase requires SSL; an sslmode in DATABASE_URL wins over DB_SSLMODE
+DB_SSLMODE = make_url(DATABASE_URL).query.get("sslmode") or os.getenv("DB_SSLMODE", "require")
+
+# Async driver for each database backend
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+def engine_options(url) -> dict:
+    """create_engine kwargs for a database URL - pool settings and driver-specific connect_args"""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        # Local development - file databases need no pool tuning or SSL
+        return {}
+    
+    options = {
+        "pool_pre_ping": True,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT
     }
-)
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"timeout": DB_CONNECT_TIMEOUT, "ssl": DB_SSLMODE}
+    else:
+        options["connect_args"] = {"connect_timeout": DB_CONNECT_TIMEOUT, "sslmode": DB_SSLMODE}
+    return options
+
+def async_database_url(url):
+    """Same database as `url`, through its async driver (asyncpg takes SSL via connect_args)"""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()]).difference_update_query(["sslmode"])
+
+# Sync engine - background email sync jobs and migrations
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine - API routes, so waiting on the database doesn't hold a threadpool thread
+ASYNC_DATABASE_URL = async_database_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+
+# expire_on_commit=False - async sessions can't lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # SQLAlchemy 2.0 Base
 class Base(DeclarativeBase):
     pass
 
+# Resume text longer than this is stored gzipped when RESUME_CONTENT_GZIP is on
+RESUME_CONTENT_GZIP = os.getenv("RESUME_CONTENT_GZIP", "false").lower() == "true"
+RESUME_GZIP_MIN_CHARS = int(os.getenv("RESUME_GZIP_MIN_CHARS", "1024"))
+RESUME_PREVIEW_CHARS = 150
+
+class CompressedText(TypeDecorator):
+    """Text column that can hold gzipped values - readable whichever way each row was written"""
+    impl = String
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is not None and RESUME_CONTENT_GZIP and len(value) >= RESUME_GZIP_MIN_CHARS:
+            return compress_text(value)
+        return value
+    
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
+
 # ==================== DATABASE MODELS ====================
 
 class User(Base):
@@ -91,8 +173,21 @@ class Application(Base):
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    change_seq = Column(Integer, nullable=True)  # User's change sequence at the last write (/api/changes)
     
     user = relationship("User", back_populates="applications")
+    
+    __table_args__ = (
+        # One imported row per company/position; backs the email import upsert.
+        # Manual rows may repeat a pair (e.g. re-applying to the same role)
+        Index(
+            "uq_applications_user_company_position_imported", "user_id", "company", "position", unique=True,
+            sqlite_where=text("email_message_id IS NOT NULL"),
+            postgresql_where=text("email_message_id IS NOT NULL")
+        ),
+        Index("ix_applications_user_created", "user_id", "created_at"),
+        Index("ix_applications_user_change_seq", "user_id", "change_seq"),
+    )
 
 class Task(Base):
     __tablename__ = "tasks"
@@ -107,8 +202,14 @@ class Task(Base):
     points = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
+    change_seq = Column(Integer, nullable=True)
     
     user = relationship("User", back_populates="tasks")
+    
+    __table_args__ = (
+        Index("ix_tasks_user_created", "user_id", "created_at"),
+        Index("ix_tasks_user_change_seq", "user_id", "change_seq"),
+    )
 
 class UserAchievement(Base):
     __tablename__ = "user_achievements"
@@ -119,6 +220,11 @@ class UserAchievement(Base):
     unlocked_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", back_populates="achievements")
+    
+    __table_args__ = (
+        Index("ix_user_achievements_user", "user_id"),
+        Index("uq_user_achievements_user_achievement", "user_id", "achievement_id", unique=True),
+    )
 
 class UserStats(Base):
     __tablename__ = "user_stats"
@@ -128,6 +234,15 @@ class UserStats(Base):
     total_points = Column(Integer, default=0)
     current_streak = Column(Integer, default=0)
     last_completed_date = Column(String, nullable=True)
+    
+    # Task/achievement counters, maintained by the task routes
+    total_tasks = Column(Integer, default=0)
+    completed_tasks = Column(Integer, default=0)
+    today_completed = Column(Integer, default=0)
+    today_date = Column(String, nullable=True)  # UTC day today_completed refers to
+    achievements_count = Column(Integer, default=0)
+    counters_reconciled_at = Column(DateTime, nullable=True)  # null = recount on next read
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -137,14 +252,25 @@ class Resume(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     filename = Column(String)
-    content = Column(String)
+    content = Column(CompressedText)  # Deferred by the list route - fetch with /api/resumes/{id}/content
+    content_preview = Column(String, nullable=True)
+    content_length = Column(Integer, nullable=True)
     file_path = Column(String, nullable=True)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
     ats_score = Column(Integer, nullable=True)
     ats_feedback = Column(String, nullable=True) 
+    content_hash = Column(String(64), nullable=True)
+    ats_content_hash = Column(String(64), nullable=True)  # content_hash the ATS score was computed for
+    change_seq = Column(Integer, nullable=True)
     
     user = relationship("User", back_populates="resumes")
+    
+    __table_args__ = (
+        Index("ix_resumes_user_uploaded", "user_id", "uploaded_at"),
+        Index("ix_resumes_ats_content_hash", "ats_content_hash"),
+        Index("ix_resumes_user_change_seq", "user_id", "change_seq"),
+    )
 
 # ✅ Email Sync Log Model
 class EmailSyncLog(Base):
@@ -158,6 +284,115 @@ class EmailSyncLog(Base):
     status = Column(String)  # 'success', 'partial', 'error'
     error_message = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_email_sync_logs_user_created", "user_id", "created_at"),
+    )
+
+# ✅ Email Sync State Model (Gmail historyId cursor for delta sync)
+class EmailSyncState(Base):
+    __tablename__ = "email_sync_state"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True)
+    history_id = Column(String, nullable=True)
+    # Full mailbox scan cut short by its page/time limits - the next sync resumes it
+    scan_query = Column(String, nullable=True)
+    scan_page_token = Column(String, nullable=True)
+    scan_history_id = Column(String, nullable=True)
+    # Oldest after: date a finished scan (plus the delta syncs since) has covered - lets later scans stop early
+    scan_covered_after = Column(String, nullable=True)
+    # JSON message ID -> failed attempts, for messages retried on the next sync
+    retry_message_ids = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# ✅ Email Classification Cache Model (AI results keyed by email content hash)
+class EmailClassification(Base):
+    __tablename__ = "email_classifications"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, index=True)
+    result = Column(String, nullable=True)  # JSON; null when not job-related
+    is_job_related = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# ✅ Collection Version Model (bumped on every write, backs list ETags)
+class CollectionVersion(Base):
+    __tablename__ = "collection_versions"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    collection = Column(String(32), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+# ✅ Deleted Record Model (tombstones, so /api/changes can report hard deletes)
+class DeletedRecord(Base):
+    __tablename__ = "deleted_records"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    collection = Column(String(32))
+    record_id = Column(Integer)
+    change_seq = Column(Integer)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_deleted_records_user_change_seq", "user_id", "change_seq"),
+    )
+
+# ✅ Sync Job Model (background email sync / ATS batch jobs, shared by every worker process)
+class SyncJobRecord(Base):
+    __tablename__ = "sync_jobs"
+    
+    job_id = Column(String(32), primary_key=True)
+    kind = Column(String(32))
+    user_id = Column(Integer, ForeignKey("users.id"))
+    status = Column(String(16))
+    progress = Column(String, nullable=True)  # JSON counters
+    result = Column(String, nullable=True)    # JSON
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)  # heartbeat - written with status and progress
+    
+    __table_args__ = (
+        # One queued or running job per user and kind, across every worker process
+        Index(
+            "uq_sync_jobs_active", "kind", "user_id", unique=True,
+            sqlite_where=text("status IN ('queued', 'running')"),
+            postgresql_where=text("status IN ('queued', 'running')")
+        ),
+    )
+
+# ✅ Background worker pools for email sync and ATS batch jobs (registry in the sync_jobs table)
+from sync_jobs import create_sync_job_manager, SyncJobManager
+sync_job_manager = create_sync_job_manager(
+    max_workers=int(os.getenv("EMAIL_SYNC_WORKERS", "2")),
+    on_change=lambda job: change_bus.broadcast(engine, job.user_id, SYNC_STATUS, job.to_dict()),
+    session_factory=SessionLocal,
+    SyncJobRecord=SyncJobRecord
+)
+ats_job_manager = SyncJobManager(
+    max_workers=1,
+    thread_name_prefix="ats-batch",
+    initial_progress={"resumes_queued": 0, "resumes_scored": 0, "memo_hits": 0, "llm_calls": 0, "errors": 0},
+    session_factory=SessionLocal,
+    SyncJobRecord=SyncJobRecord
+)
+
+# Collections with a version stamp
+APPLICATIONS = "applications"
+TASKS = "tasks"
+STATS = "stats"
+RESUMES = "resumes"
+SYNC_LOGS = "sync_logs"
+
+# Change feed event for email sync job progress (relayed to every worker, not versioned)
+SYNC_STATUS = "sync_status"
+
+# Per-user counter behind the /api/changes cursor, bumped by every write
+CHANGES = "changes"
 
 # ==================== PYDANTIC MODELS ====================
 
@@ -238,7 +473,9 @@ class StatsResponse(BaseModel):
 class AIMessageRequest(BaseModel):
     message: str
     tool_id: str
-    conversation_history: Optional[List[dict]] = []
+    conversation_history: Optional[List[dict]] = []  # Only needed to start (or restore) a session
+    session_id: Optional[str] = None  # From the X-Chat-Session header of the previous turn
+    no_cache: bool = False  # Skip the response cache and always ask Gemini
 
 class AIMessageResponse(BaseModel):
     response: str
@@ -249,6 +486,24 @@ class ResumeCreate(BaseModel):
     filename: str
     content: str
 
+class ResumeSummaryResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    filename: str
+    content_preview: Optional[str] = None
+    content_length: Optional[int] = None
+    uploaded_at: datetime
+    is_active: bool
+    ats_score: Optional[int] = None
+    ats_feedback: Optional[str] = None
+
+class ResumeContentResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    content: str
+
 class ResumeResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     
@@ -264,6 +519,7 @@ class ResumeResponse(BaseModel):
 class EmailSyncRequest(BaseModel):
     days_back: int = 30
     use_ai: bool = False
+    full_sync: bool = False
 
 # ==================== CONSTANTS ====================
 
@@ -278,16 +534,24 @@ TASK_CATEGORIES = {
     "Other": 5
 }
 
+# Each achievement unlocks once `counter` (a UserStats column) reaches `threshold`
 ACHIEVEMENTS = {
-    "first_task": {"name": "Getting Started", "description": "Complete your first task", "points": 50},
-    "streak_3": {"name": "On a Roll", "description": "3-day streak", "points": 100},
-    "streak_7": {"name": "Week Warrior", "description": "7-day streak", "points": 200},
-    "points_100": {"name": "Century Club", "description": "Earn 100 points", "points": 50},
-    "points_500": {"name": "High Achiever", "description": "Earn 500 points", "points": 100},
-    "tasks_50": {"name": "Task Master", "description": "Complete 50 tasks", "points": 150},
-    "daily_5": {"name": "Power User", "description": "Complete 5 tasks in one day", "points": 100}
+    "first_task": {"name": "Getting Started", "description": "Complete your first task", "points": 50, "counter": "completed_tasks", "threshold": 1},
+    "streak_3": {"name": "On a Roll", "description": "3-day streak", "points": 100, "counter": "current_streak", "threshold": 3},
+    "streak_7": {"name": "Week Warrior", "description": "7-day streak", "points": 200, "counter": "current_streak", "threshold": 7},
+    "points_100": {"name": "Century Club", "description": "Earn 100 points", "points": 50, "counter": "total_points", "threshold": 100},
+    "points_500": {"name": "High Achiever", "description": "Earn 500 points", "points": 100, "counter": "total_points", "threshold": 500},
+    "tasks_50": {"name": "Task Master", "description": "Complete 50 tasks", "points": 150, "counter": "completed_tasks", "threshold": 50},
+    "daily_5": {"name": "Power User", "description": "Complete 5 tasks in one day", "points": 100, "counter": "today_completed", "threshold": 5}
 }
 
+# Counter -> [(threshold, achievement_id)], so only rules on changed counters are checked
+ACHIEVEMENT_RULES = {}
+for _achievement_id, _achievement in ACHIEVEMENTS.items():
+    ACHIEVEMENT_RULES.setdefault(_achievement["counter"], []).append(
+        (_achievement["threshold"], _achievement_id)
+    )
+
 # ==================== LIFESPAN EVENTS ====================
 
 @asynccontextmanager
@@ -295,18 +559,30 @@ async def lifespan(app: FastAPI):
     # Startup
     try:
         Base.metadata.create_all(bind=engine)
-        print("✅ Connected to Supabase PostgreSQL")
-        print("✅ Database tables initialized")
-        print(f"🚀 API running at http://localhost:8000")
-        print(f"📚 API docs at http://localhost:8000/docs")
+        run_migrations(engine)
     except Exception as e:
-        print(f"❌ Database connection failed: {e}")
+        print(f"❌ Database setup failed: {e}")
         print("Please check your DATABASE_URL in .env file")
+        # Serving on a missing or half-migrated schema would only fail later, route by route
+        raise
+    print("✅ Connected to Supabase PostgreSQL")
+    print("✅ Database tables initialized")
+    print(f"🚀 API running at http://localhost:8000")
+    print(f"📚 API docs at http://localhost:8000/docs")
+    
+    await change_bus.start(async_engine)
     
     yield
     
     # Shutdown
     print("🛑 Shutting down...")
+    await change_bus.stop()
+    sync_job_manager.shutdown()
+    ats_job_manager.shutdown()
+    pdf_text_extractor.shutdown()
+    if ats_scorer:
+        ats_scorer.shutdown()
+    await async_engine.dispose()
 
 # ==================== FASTAPI APP ====================
 
@@ -325,21 +601,126 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing", "X-Next-Cursor", "X-AI-Cache", "X-Prompt-Tokens", "X-Chat-Session"],
 )
 
 # ==================== DEPENDENCIES ====================
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 DEMO_USER_ID = 1
 
-def get_or_create_demo_user(db: Session):
-    user = db.query(User).filter(User.id == DEMO_USER_ID).first()
+# ==================== PAGINATION ====================
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def fetch_page(db: AsyncSession, query, model, cursor: Optional[str], limit: int) -> Tuple[list, Optional[str]]:
+    """Keyset page on (created_at, id) descending; returns (rows, cursor for the next page or None)"""
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    
+    rows = (await db.scalars(query.limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, None
+
+async def paginate_by_created(db: AsyncSession, query, model, cursor: Optional[str], limit: int, response: Response):
+    """fetch_page for list routes; sets X-Next-Cursor if more rows exist"""
+    rows, next_cursor = await fetch_page(db, query, model, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+# ==================== CONDITIONAL GET ====================
+
+def version_bump_statement(insert, user_id: int, collection: str):
+    now = datetime.utcnow()
+    return insert(CollectionVersion).values(
+        user_id=user_id, collection=collection, version=1, updated_at=now
+    ).on_conflict_do_update(
+        index_elements=[CollectionVersion.user_id, CollectionVersion.collection],
+        set_={"version": CollectionVersion.version + 1, "updated_at": now}
+    ).returning(CollectionVersion.version)
+
+async def bump_versions(db: AsyncSession, user_id: int, *collections: str) -> int:
+    """
+    Advance the collections' version stamps in the caller's transaction and announce them on commit
+    
+    The user's change counter is bumped first. Its row lock is held until commit, so
+    sequence numbers become visible in order and /api/changes can't skip a write.
+    
+    Returns:
+        The user's change sequence number - stamp it on every row the transaction changes
+    """
+    seq = await db.scalar(version_bump_statement(dialect_insert(db), user_id, CHANGES))
+    for collection in collections:
+        version = await db.scalar(version_bump_statement(dialect_insert(db), user_id, collection))
+        change_bus.record(db.sync_session, user_id, collection, version)
+        if db.get_bind().dialect.name == "postgresql":
+            await db.execute(notify_statement(user_id, collection, version))
+    return seq
+
+def bump_versions_sync(db: Session, user_id: int, *collections: str) -> int:
+    """bump_versions for background jobs on the sync engine"""
+    seq = db.scalar(version_bump_statement(dialect_insert(db), user_id, CHANGES))
+    for collection in collections:
+        version = db.scalar(version_bump_statement(dialect_insert(db), user_id, collection))
+        change_bus.record(db, user_id, collection, version)
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(notify_statement(user_id, collection, version))
+    return seq
+
+async def current_change_cursor(db: AsyncSession, user_id: int) -> int:
+    """The user's latest change sequence number (0 before the first write)"""
+    return await db.scalar(select(CollectionVersion.version).where(
+        CollectionVersion.user_id == user_id,
+        CollectionVersion.collection == CHANGES
+    )) or 0
+
+def record_deletions(db: AsyncSession, user_id: int, collection: str, record_ids: List[int], seq: int):
+    """Leave tombstones for hard-deleted rows, so /api/changes can report them"""
+    db.add_all([
+        DeletedRecord(user_id=user_id, collection=collection, record_id=record_id, change_seq=seq)
+        for record_id in record_ids
+    ])
+
+async def not_modified(db: AsyncSession, request: Request, response: Response, user_id: int,
+                       collection: str, extra: str = "") -> Optional[Response]:
+    """
+    ETag from the collection's version stamp (plus query string and `extra`).
+    Returns a 304 if the client already has it, else sets the ETag and returns None.
+    """
+    version = await db.scalar(select(CollectionVersion.version).where(
+        CollectionVersion.user_id == user_id,
+        CollectionVersion.collection == collection
+    )) or 0
+    variant = hashlib.sha1(f"{request.url.query}|{extra}".encode()).hexdigest()[:12]
+    etag = f'W/"{collection}-{version}-{variant}"'
+    
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+async def get_or_create_demo_user(db: AsyncSession):
+    user = await db.get(User, DEMO_USER_ID)
     if not user:
         user = User(
             id=DEMO_USER_ID,
@@ -348,19 +729,91 @@ def get_or_create_demo_user(db: Session):
             hashed_password="demo_hash"
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     return user
 
-def get_or_create_user_stats(db: Session, user_id: int):
-    stats = db.query(UserStats).filter(UserStats.user_id == user_id).first()
+def dialect_insert(db: AsyncSession):
+    """INSERT construct with ON CONFLICT support for the session's database, or None"""
+    return {"postgresql": postgresql.insert, "sqlite": sqlite.insert}.get(db.get_bind().dialect.name)
+
+async def ensure_user_stats(db: AsyncSession, user_id: int):
+    """Create the user's stats row if missing, without committing"""
+    try:
+        # Savepoint, so a concurrent request creating the same row doesn't fail this one
+        async with db.begin_nested():
+            db.add(UserStats(user_id=user_id))
+    except IntegrityError:
+        pass
+
+async def get_or_create_user_stats(db: AsyncSession, user_id: int):
+    query = select(UserStats).where(UserStats.user_id == user_id)
+    stats = await db.scalar(query)
     if not stats:
-        stats = UserStats(user_id=user_id)
-        db.add(stats)
-        db.commit()
-        db.refresh(stats)
+        await ensure_user_stats(db, user_id)
+        stats = await db.scalar(query)
     return stats
 
+# Columns returned by update_user_stats
+STATS_RETURNING = (
+    UserStats.id, UserStats.created_at, UserStats.total_points, UserStats.current_streak,
+    UserStats.total_tasks, UserStats.completed_tasks, UserStats.today_completed, UserStats.achievements_count
+)
+
+async def update_user_stats(db: AsyncSession, user_id: int, **values):
+    """Apply SQL-expression updates to the stats row in one UPDATE ... RETURNING"""
+    stmt = update(UserStats).where(UserStats.user_id == user_id).values(
+        updated_at=datetime.utcnow(), **values
+    ).returning(*STATS_RETURNING).execution_options(synchronize_session=False)
+    
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        await ensure_user_stats(db, user_id)
+        row = (await db.execute(stmt)).one()
+    return dict(row._mapping)
+
+def decrement(column, amount=1):
+    """SQL expression for column - amount, floored at zero"""
+    return case((column > amount, column - amount), else_=0)
+
+def uncomplete_stats_values(points: int, completed_at: Optional[datetime]) -> dict:
+    """Stats updates taking a completed task out of the counters"""
+    values = {
+        "total_points": decrement(UserStats.total_points, points),
+        "completed_tasks": decrement(UserStats.completed_tasks)
+    }
+    today = datetime.utcnow().date()
+    if completed_at and completed_at.date() == today:
+        values["today_completed"] = case(
+            (UserStats.today_date == today.isoformat(), decrement(UserStats.today_completed)),
+            else_=UserStats.today_completed
+        )
+    return values
+
+async def reconcile_user_stats(db: AsyncSession, stats: UserStats):
+    """Recount task/achievement counters from the source tables in one query"""
+    today_start = datetime.combine(datetime.utcnow().date(), time.min)
+    achievements = select(func.count(UserAchievement.id)).where(
+        UserAchievement.user_id == stats.user_id
+    ).scalar_subquery()
+    
+    total, completed, today_completed, achievements_count = (await db.execute(
+        select(
+            func.count(Task.id),
+            func.count(Task.id).filter(Task.completed == True),
+            func.count(Task.id).filter(Task.completed == True, Task.completed_at >= today_start),
+            achievements
+        ).where(Task.user_id == stats.user_id)
+    )).one()
+    
+    stats.total_tasks = total
+    stats.completed_tasks = completed
+    stats.today_completed = today_completed
+    stats.today_date = today_start.date().isoformat()
+    stats.achievements_count = achievements_count
+    stats.counters_reconciled_at = datetime.utcnow()
+    await db.commit()
+
 # ==================== AI ASSISTANT ROUTES ====================
 
 AI_TOOL_PROMPTS = {
@@ -402,6 +855,77 @@ AI_TOOL_PROMPTS = {
     5. Work-life balance and career satisfaction"""
 }
 
+# Seconds a response stays cached per tool (0 = never cached); override with AI_CACHE_TTL_<TOOL_ID>
+# Answers that depend only on the question are cached; cover letters are meant to vary
+AI_CACHE_TTL_DEFAULTS = {
+    "resume-match": 3600,
+    "cover-letter": 0,
+    "interview-prep": 6 * 3600,
+    "company-research": 24 * 3600,
+    "career-advice": 6 * 3600
+}
+
+ai_response_cache = ResponseCache(
+    max_entries=int(os.getenv("AI_CACHE_SIZE", "500")),
+    ttl_seconds={
+        tool_id: int(os.getenv(f"AI_CACHE_TTL_{tool_id.upper().replace('-', '_')}", ttl))
+        for tool_id, ttl in AI_CACHE_TTL_DEFAULTS.items()
+    }
+)
+
+# Conversation summaries use the fast model with a small output cap
+SUMMARY_MODEL = "gemini-3-flash-preview"
+
+async def summarize_conversation(text: str, max_tokens: int) -> str:
+    response = await client.aio.models.generate_content(
+        model=SUMMARY_MODEL,
+        contents=(
+            "Condense this conversation between a job seeker and a career assistant into a short summary. "
+            "Keep companies, roles, dates, numbers and anything the user asked to remember.\n\n" + text
+        ),
+        config={"max_output_tokens": max_tokens, "temperature": 0.2}
+    )
+    return response.text or ""
+
+prompt_builder = PromptBuilder(summarize_conversation if GEMINI_API_KEY else None)
+
+chat_sessions = ChatSessionStore(client if GEMINI_API_KEY else None)
+
+def sse_chunk(text: str) -> str:
+    return f"data: {json.dumps({'text': text})}\n\n"
+
+# Recent chat stream timings, summarised by /api/ai/status
+CHAT_STREAM_METRICS = deque(maxlen=int(os.getenv("AI_STREAM_METRICS_WINDOW", "200")))
+
+def record_chat_stream(metrics: dict):
+    """Log one finished chat stream's time-to-first-byte and inter-chunk gaps"""
+    gaps = metrics.pop("gaps_ms")
+    metrics["max_gap_ms"] = max(gaps) if gaps else None
+    metrics["mean_gap_ms"] = sum(gaps) / len(gaps) if gaps else None
+    CHAT_STREAM_METRICS.append(metrics)
+    
+    ttfb = f"{metrics['ttfb_ms']:.0f} ms" if metrics["ttfb_ms"] is not None else "-"
+    gap = f"{metrics['mean_gap_ms']:.0f}/{metrics['max_gap_ms']:.0f} ms" if gaps else "-"
+    print(f"📡 Chat stream {metrics['outcome']} ({metrics['model']}): {metrics['chunks']} chunks, "
+          f"first byte {ttfb}, gap mean/max {gap}, total {metrics['total_ms']:.0f} ms")
+
+def chat_stream_summary() -> dict:
+    """Median and p95 time-to-first-byte and inter-chunk gap over the recent streams"""
+    def percentiles(values):
+        values = sorted(v for v in values if v is not None)
+        if not values:
+            return None
+        return {"p50": round(values[len(values) // 2], 1), "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 1)}
+    
+    streams = list(CHAT_STREAM_METRICS)
+    return {
+        "streams": len(streams),
+        "cancelled": sum(1 for m in streams if m["outcome"] == "cancelled"),
+        "errors": sum(1 for m in streams if m["outcome"] == "error"),
+        "ttfb_ms": percentiles(m["ttfb_ms"] for m in streams),
+        "max_gap_ms": percentiles(m["max_gap_ms"] for m in streams)
+    }
+
 @app.post("/api/ai/chat")
 async def ai_chat(request: AIMessageRequest):
     """Handle AI assistant chat requests with STREAMING"""
@@ -426,41 +950,117 @@ async def ai_chat(request: AIMessageRequest):
         selected_model = "gemini-3-flash-preview"
         print(f"⚡ Using Gemini 3 Flash for fast response: {request.tool_id}")
     
-    full_prompt = f"{system_prompt}\n\nUser: {request.message}"
+    # Turns live server-side; a new session can be seeded from conversation_history
+    if request.session_id:
+        session = chat_sessions.get(request.session_id, DEMO_USER_ID)
+        if not session or session.tool_id != request.tool_id:
+            raise HTTPException(status_code=410, detail="Chat session expired - resend with conversation_history")
+    else:
+        session = chat_sessions.create(DEMO_USER_ID, request.tool_id, selected_model, request.conversation_history)
+    
+    # Fit the model's token budget; turns that don't fit come from a cached rolling summary.
+    # The whole session is a candidate, so the prefix stays stable enough to context-cache.
+    prompt = prompt_builder.build(
+        selected_model, system_prompt, request.message, session.turns,
+        max_recent_turns=CHAT_SESSION_MAX_TURNS
+    )
+    full_prompt = prompt.text
+    if prompt.truncated_message or prompt.summarized_turns:
+        print(f"✂️  Prompt fitted to {prompt.tokens}/{prompt.budget} tokens "
+              f"(message truncated: {prompt.truncated_message}, {prompt.summarized_turns} turns summarized)")
+    
+    # Send only what the session's Gemini context cache doesn't already hold
+    context_cache, uncached_turns = session.cached_prefix(prompt.system_instruction, prompt.turns)
+    contents = to_gemini_contents(uncached_turns + [{"role": "user", "content": prompt.message}])
+    generation_config = {"max_output_tokens": 1000, "temperature": 0.7}
+    if context_cache:
+        generation_config["cached_content"] = context_cache
+        chat_sessions.cached_requests += 1
+    else:
+        generation_config["system_instruction"] = prompt.system_instruction
+    sent_tokens = sum(estimate_tokens(turn["content"]) for turn in uncached_turns) + estimate_tokens(prompt.message) + \
+        (0 if context_cache else estimate_tokens(prompt.system_instruction))
+    
+    def finish_turn(reply: str):
+        # Record the exchange and cache the grown prefix for the next turn, off the request path
+        session.add_exchange(request.message, reply)
+        chat_sessions.refresh_cache(
+            session, prompt.system_instruction,
+            prompt.turns + [{"role": "user", "content": prompt.message}, {"role": "assistant", "content": reply}]
+        )
+    
+    use_cache = not request.no_cache and ai_response_cache.cacheable(request.tool_id)
+    cache_key = prompt_hash(request.tool_id, selected_model, full_prompt)
+    cached = ai_response_cache.get(cache_key) if use_cache else None
     
-    if request.conversation_history:
-        history_text = "\n".join([
-            f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}"
-            for msg in request.conversation_history[-5:]
-        ])
-        full_prompt = f"{system_prompt}\n\nPrevious conversation:\n{history_text}\n\nUser: {request.message}"
+    async def replay_cached():
+        # Same SSE framing as a live stream, so the frontend can't tell the difference
+        for text in cached.chunks:
+            yield sse_chunk(text)
+        finish_turn("".join(cached.chunks))
+        yield "data: [DONE]\n\n"
     
     async def generate_stream():
+        started = perf_counter()
+        # Outcome stays "cancelled" unless the stream finishes or fails - a disconnect closes the generator
+        metrics = {"tool_id": request.tool_id, "model": selected_model, "outcome": "cancelled", "chunks": 0, "ttfb_ms": None, "gaps_ms": []}
+        last_chunk = None
+        stream = None
+        texts = []
+        tokens = None
         try:
-            for chunk in client.models.generate_content_stream(
+            # Async client - waiting on Gemini yields the event loop to other requests
+            stream = await client.aio.models.generate_content_stream(
                 model=selected_model,
-                contents=full_prompt,
-                config={
-                    "max_output_tokens": 1000,
-                    "temperature": 0.7
-                }
-            ):
+                contents=contents,
+                config=generation_config
+            )
+            async for chunk in stream:
+                if chunk.usage_metadata and chunk.usage_metadata.total_token_count:
+                    tokens = chunk.usage_metadata.total_token_count
                 if chunk.text:
-                    yield f"data: {json.dumps({'text': chunk.text})}\n\n"
+                    now = perf_counter()
+                    if last_chunk is None:
+                        metrics["ttfb_ms"] = (now - started) * 1000
+                    else:
+                        metrics["gaps_ms"].append((now - last_chunk) * 1000)
+                    last_chunk = now
+                    metrics["chunks"] += 1
+                    texts.append(chunk.text)
+                    yield sse_chunk(chunk.text)
             
+            metrics["outcome"] = "completed"
+            if use_cache and texts:
+                ai_response_cache.put(
+                    cache_key, request.tool_id, texts,
+                    tokens or estimate_tokens(full_prompt) + estimate_tokens("".join(texts))
+                )
+            if texts:
+                finish_turn("".join(texts))
             yield "data: [DONE]\n\n"
             
         except Exception as e:
             print(f"Error calling Gemini API: {e}")
+            metrics["outcome"] = "error"
             error_msg = json.dumps({'error': str(e)})
             yield f"data: {error_msg}\n\n"
+        finally:
+            # Closing the stream drops the upstream HTTP response, which stops the generation
+            if stream is not None:
+                with anyio.CancelScope(shield=True):
+                    await stream.aclose()
+            metrics["total_ms"] = (perf_counter() - started) * 1000
+            record_chat_stream(metrics)
     
     return StreamingResponse(
-        generate_stream(),
+        replay_cached() if cached else generate_stream(),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
-            "X-Accel-Buffering": "no"
+            "X-Accel-Buffering": "no",
+            "X-AI-Cache": "hit" if cached else ("miss" if use_cache else "bypass"),
+            "X-Prompt-Tokens": str(sent_tokens),
+            "X-Chat-Session": session.session_id
         }
     )
 
@@ -470,9 +1070,24 @@ async def ai_status():
     return {
         "available": GEMINI_API_KEY is not None,
         "models": ["gemini-3-pro-preview", "gemini-3-flash-preview"] if GEMINI_API_KEY else None,
-        "message": "AI Assistant ready with intelligent model routing" if GEMINI_API_KEY else "GEMINI_API_KEY not configured"
+        "message": "AI Assistant ready with intelligent model routing" if GEMINI_API_KEY else "GEMINI_API_KEY not configured",
+        "stream_metrics": chat_stream_summary(),
+        "conversation_summaries": prompt_builder.stats(),
+        "chat_sessions": chat_sessions.stats()
     }
 
+@app.delete("/api/ai/sessions/{session_id}")
+async def delete_chat_session(session_id: str):
+    """End a chat session and drop its context cache"""
+    if not chat_sessions.delete(session_id, DEMO_USER_ID):
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    return {"message": "Chat session deleted"}
+
+@app.get("/api/ai/cache")
+async def get_ai_cache_stats():
+    """Get hit rate and tokens saved by the AI response cache"""
+    return ai_response_cache.stats()
+
 # ==================== ROOT ROUTE ====================
 
 @app.get("/")
@@ -488,81 +1103,136 @@ def root():
 # ========== APPLICATION ROUTES ==========
 
 @app.get("/api/applications", response_model=List[ApplicationResponse])
-def get_applications(db: Session = Depends(get_db)):
-    get_or_create_demo_user(db)
-    applications = db.query(Application).filter(
-        Application.user_id == DEMO_USER_ID
-    ).order_by(Application.created_at.desc()).all()
-    return applications
+async def get_applications(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[str] = None,
+    company: Optional[str] = Query(None, description="Company name prefix (case-insensitive)"),
+    applied_from: Optional[datetime] = None,
+    applied_to: Optional[datetime] = None,
+    auto_imported: Optional[bool] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    if cached := await not_modified(db, request, response, DEMO_USER_ID, APPLICATIONS):
+        return cached
+    await get_or_create_demo_user(db)
+    query = select(Application).where(Application.user_id == DEMO_USER_ID)
+    
+    if status:
+        query = query.where(Application.status == status)
+    if company:
+        query = query.where(Application.company.istartswith(company, autoescape=True))
+    if applied_from:
+        query = query.where(Application.date_applied >= applied_from)
+    if applied_to:
+        query = query.where(Application.date_applied <= applied_to)
+    if auto_imported is not None:
+        query = query.where(Application.auto_imported == auto_imported)
+    
+    return await paginate_by_created(db, query, Application, cursor, limit, response)
 
 @app.post("/api/applications", response_model=ApplicationResponse)
-def create_application(application: ApplicationCreate, db: Session = Depends(get_db)):
-    get_or_create_demo_user(db)
+async def create_application(application: ApplicationCreate, db: AsyncSession = Depends(get_async_db)):
+    await get_or_create_demo_user(db)
     db_application = Application(
         user_id=DEMO_USER_ID,
         **application.dict()
     )
     db.add(db_application)
-    db.commit()
-    db.refresh(db_application)
+    db_application.change_seq = await bump_versions(db, DEMO_USER_ID, APPLICATIONS)
+    await db.commit()
+    await db.refresh(db_application)
     return db_application
 
 @app.get("/api/applications/{application_id}", response_model=ApplicationResponse)
-def get_application(application_id: int, db: Session = Depends(get_db)):
-    application = db.query(Application).filter(
+async def get_application(application_id: int, db: AsyncSession = Depends(get_async_db)):
+    application = await db.scalar(select(Application).where(
         Application.id == application_id,
         Application.user_id == DEMO_USER_ID
-    ).first()
+    ))
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
     return application
 
 @app.put("/api/applications/{application_id}", response_model=ApplicationResponse)
-def update_application(
+async def update_application(
     application_id: int,
     application_update: ApplicationUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    application = db.query(Application).filter(
+    application = await db.scalar(select(Application).where(
         Application.id == application_id,
         Application.user_id == DEMO_USER_ID
-    ).first()
+    ))
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
     
     for key, value in application_update.dict(exclude_unset=True).items():
         setattr(application, key, value)
     
-    db.commit()
-    db.refresh(application)
+    try:
+        application.change_seq = await bump_versions(db, DEMO_USER_ID, APPLICATIONS)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        # Only email-imported rows are unique per company/position
+        raise HTTPException(status_code=409, detail="Another imported application already has this company and position")
+    await db.refresh(application)
     return application
 
 @app.delete("/api/applications/{application_id}")
-def delete_application(application_id: int, db: Session = Depends(get_db)):
-    application = db.query(Application).filter(
+async def delete_application(application_id: int, db: AsyncSession = Depends(get_async_db)):
+    application = await db.scalar(select(Application).where(
         Application.id == application_id,
         Application.user_id == DEMO_USER_ID
-    ).first()
+    ))
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
     
-    db.delete(application)
-    db.commit()
+    await db.delete(application)
+    seq = await bump_versions(db, DEMO_USER_ID, APPLICATIONS)
+    record_deletions(db, DEMO_USER_ID, APPLICATIONS, [application_id], seq)
+    await db.commit()
     return {"message": "Application deleted successfully"}
 
 # ========== TASK ROUTES ==========
 
 @app.get("/api/tasks", response_model=List[TaskResponse])
-def get_tasks(db: Session = Depends(get_db)):
-    get_or_create_demo_user(db)
-    tasks = db.query(Task).filter(
-        Task.user_id == DEMO_USER_ID
-    ).order_by(Task.created_at.desc()).all()
-    return tasks
+async def get_tasks(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    completed: Optional[bool] = None,
+    category: Optional[str] = None,
+    priority: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    if cached := await not_modified(db, request, response, DEMO_USER_ID, TASKS):
+        return cached
+    await get_or_create_demo_user(db)
+    query = select(Task).where(Task.user_id == DEMO_USER_ID)
+    
+    if completed is not None:
+        query = query.where(Task.completed == completed)
+    if category:
+        query = query.where(Task.category == category)
+    if priority:
+        query = query.where(Task.priority == priority)
+    if created_from:
+        query = query.where(Task.created_at >= created_from)
+    if created_to:
+        query = query.where(Task.created_at <= created_to)
+    
+    return await paginate_by_created(db, query, Task, cursor, limit, response)
 
 @app.post("/api/tasks", response_model=TaskResponse)
-def create_task(task: TaskCreate, db: Session = Depends(get_db)):
-    get_or_create_demo_user(db)
+async def create_task(task: TaskCreate, db: AsyncSession = Depends(get_async_db)):
+    await get_or_create_demo_user(db)
     points = TASK_CATEGORIES.get(task.category, 5)
     db_task = Task(
         user_id=DEMO_USER_ID,
@@ -570,154 +1240,230 @@ def create_task(task: TaskCreate, db: Session = Depends(get_db)):
         **task.dict()
     )
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    await update_user_stats(db, DEMO_USER_ID, total_tasks=UserStats.total_tasks + 1)
+    db_task.change_seq = await bump_versions(db, DEMO_USER_ID, TASKS, STATS)
+    await db.commit()
+    await db.refresh(db_task)
     return db_task
 
 @app.put("/api/tasks/{task_id}", response_model=TaskResponse)
-def update_task(task_id: int, task_update: TaskUpdate, db: Session = Depends(get_db)):
-    task = db.query(Task).filter(
+async def update_task(task_id: int, task_update: TaskUpdate, db: AsyncSession = Depends(get_async_db)):
+    task = await db.scalar(select(Task).where(
         Task.id == task_id,
         Task.user_id == DEMO_USER_ID
-    ).first()
+    ).with_for_update())
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    if task_update.completed is not None:
-        was_completed = task.completed
-        is_completing = task_update.completed and not was_completed
-        is_uncompleting = not task_update.completed and was_completed
+    if task_update.completed is not None and task_update.completed != task.completed:
+        now = datetime.utcnow()
+        today = now.date().isoformat()
+        yesterday = (now.date() - timedelta(days=1)).isoformat()
+        completed_at = task.completed_at
         
-        stats = get_or_create_user_stats(db, DEMO_USER_ID)
+        # Compare-and-set, so toggles racing from several tabs only count once
+        points = (await db.execute(
+            update(Task).where(
+                Task.id == task.id,
+                Task.completed == (not task_update.completed)
+            ).values(
+                completed=task_update.completed,
+                completed_at=now if task_update.completed else None
+            ).returning(Task.points).execution_options(synchronize_session=False)
+        )).scalar()
         
-        if is_completing:
-            task.completed = True
-            task.completed_at = datetime.utcnow()
-            stats.total_points += task.points
-            
-            today = datetime.utcnow().date().isoformat()
-            yesterday = (datetime.utcnow().date()).isoformat()
-            
-            if stats.last_completed_date != today:
-                if stats.last_completed_date == yesterday:
-                    stats.current_streak += 1
-                else:
-                    stats.current_streak = 1
-                stats.last_completed_date = today
-            
-            stats.updated_at = datetime.utcnow()
-            check_and_unlock_achievements(db, DEMO_USER_ID, stats)
-            
-        elif is_uncompleting:
-            task.completed = False
-            task.completed_at = None
-            stats.total_points = max(0, stats.total_points - task.points)
-            stats.updated_at = datetime.utcnow()
+        if points is not None and task_update.completed:
+            counters = await update_user_stats(
+                db, DEMO_USER_ID,
+                total_points=UserStats.total_points + points,
+                completed_tasks=UserStats.completed_tasks + 1,
+                today_completed=case(
+                    (UserStats.today_date == today, UserStats.today_completed + 1),
+                    else_=1
+                ),
+                today_date=today,
+                current_streak=case(
+                    (UserStats.last_completed_date == today, UserStats.current_streak),
+                    (UserStats.last_completed_date == yesterday, UserStats.current_streak + 1),
+                    else_=1
+                ),
+                last_completed_date=today
+            )
+            await check_and_unlock_achievements(
+                db, DEMO_USER_ID, counters,
+                changed_counters={"completed_tasks", "today_completed", "total_points", "current_streak"}
+            )
+        elif points is not None:
+            await update_user_stats(db, DEMO_USER_ID, **uncomplete_stats_values(points, completed_at))
     
     for key, value in task_update.dict(exclude_unset=True, exclude={'completed'}).items():
         setattr(task, key, value)
     
-    db.commit()
-    db.refresh(task)
+    task.change_seq = await bump_versions(db, DEMO_USER_ID, TASKS, STATS)
+    await db.commit()
+    await db.refresh(task)
     return task
 
 @app.delete("/api/tasks/{task_id}")
-def delete_task(task_id: int, db: Session = Depends(get_db)):
-    task = db.query(Task).filter(
-        Task.id == task_id,
-        Task.user_id == DEMO_USER_ID
-    ).first()
-    if not task:
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_async_db)):
+    # Delete and read back in one statement, so a repeated delete can't uncount twice
+    deleted = (await db.execute(
+        delete(Task).where(
+            Task.id == task_id,
+            Task.user_id == DEMO_USER_ID
+        ).returning(Task.completed, Task.points, Task.completed_at).execution_options(synchronize_session=False)
+    )).first()
+    if not deleted:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    if task.completed:
-        stats = get_or_create_user_stats(db, DEMO_USER_ID)
-        stats.total_points = max(0, stats.total_points - task.points)
-        stats.updated_at = datetime.utcnow()
+    values = {"total_tasks": decrement(UserStats.total_tasks)}
+    if deleted.completed:
+        values.update(uncomplete_stats_values(deleted.points, deleted.completed_at))
+    await update_user_stats(db, DEMO_USER_ID, **values)
     
-    db.delete(task)
-    db.commit()
+    seq = await bump_versions(db, DEMO_USER_ID, TASKS, STATS)
+    record_deletions(db, DEMO_USER_ID, TASKS, [task_id], seq)
+    await db.commit()
     return {"message": "Task deleted successfully"}
 
 # ========== STATS & ACHIEVEMENTS ==========
 
 @app.get("/api/stats", response_model=StatsResponse)
-def get_stats(db: Session = Depends(get_db)):
-    get_or_create_demo_user(db)
-    stats = get_or_create_user_stats(db, DEMO_USER_ID)
-    
-    all_tasks = db.query(Task).filter(Task.user_id == DEMO_USER_ID).all()
-    completed_tasks = [t for t in all_tasks if t.completed]
-    pending_tasks = [t for t in all_tasks if not t.completed]
+async def get_stats(reconcile: bool = False, db: AsyncSession = Depends(get_async_db)):
+    await get_or_create_demo_user(db)
+    return await load_stats(db, reconcile)
+
+async def load_stats(db: AsyncSession, reconcile: bool = False) -> StatsResponse:
+    stats = await get_or_create_user_stats(db, DEMO_USER_ID)
     
-    today = datetime.utcnow().date()
-    today_completed = [t for t in completed_tasks if t.completed_at and t.completed_at.date() == today]
+    # Counters are kept up to date by the task routes; recount only when asked or never counted
+    if reconcile or stats.counters_reconciled_at is None:
+        await reconcile_user_stats(db, stats)
     
-    achievements = db.query(UserAchievement).filter(UserAchievement.user_id == DEMO_USER_ID).all()
+    today = datetime.utcnow().date().isoformat()
     
     return StatsResponse(
         total_points=stats.total_points,
         current_streak=stats.current_streak,
-        total_tasks=len(all_tasks),
-        completed_tasks=len(completed_tasks),
-        pending_tasks=len(pending_tasks),
-        today_completed=len(today_completed),
-        achievements_count=len(achievements)
+        total_tasks=stats.total_tasks,
+        completed_tasks=stats.completed_tasks,
+        pending_tasks=stats.total_tasks - stats.completed_tasks,
+        today_completed=stats.today_completed if stats.today_date == today else 0,
+        achievements_count=stats.achievements_count
     )
 
 @app.get("/api/achievements")
-def get_achievements(db: Session = Depends(get_db)):
-    get_or_create_demo_user(db)
-    achievements = db.query(UserAchievement).filter(
+async def get_achievements(db: AsyncSession = Depends(get_async_db)):
+    await get_or_create_demo_user(db)
+    return await load_achievements(db)
+
+async def load_achievements(db: AsyncSession) -> List[dict]:
+    achievements = (await db.scalars(select(UserAchievement).where(
         UserAchievement.user_id == DEMO_USER_ID
-    ).all()
+    ))).all()
     return [{"achievement_id": a.achievement_id, "unlocked_at": a.unlocked_at} for a in achievements]
 
-def check_and_unlock_achievements(db: Session, user_id: int, stats: UserStats):
-    existing = db.query(UserAchievement).filter(UserAchievement.user_id == user_id).all()
-    existing_ids = {a.achievement_id for a in existing}
-    
-    all_tasks = db.query(Task).filter(Task.user_id == user_id).all()
-    completed_tasks = [t for t in all_tasks if t.completed]
-    
-    today = datetime.utcnow().date()
-    today_completed = [t for t in completed_tasks if t.completed_at and t.completed_at.date() == today]
-    
+# Unlocked achievement IDs per stats row, keyed by (id, created_at) since a reset recreates the row.
+# LRU so rows left behind by resets don't pile up; only the event loop touches it, so no lock
+UNLOCKED_ACHIEVEMENTS_CACHE_SIZE = int(os.getenv("UNLOCKED_ACHIEVEMENTS_CACHE_SIZE", "1000"))
+unlocked_achievements_cache: "OrderedDict[tuple, set]" = OrderedDict()
+
+def cached_unlocked_achievements(counters: dict) -> set:
+    """Set of achievement IDs known to be unlocked for a stats row (evicting the least recently used row)"""
+    key = (counters["id"], counters["created_at"])
+    unlocked = unlocked_achievements_cache.get(key)
+    if unlocked is None:
+        unlocked = unlocked_achievements_cache[key] = set()
+        while len(unlocked_achievements_cache) > UNLOCKED_ACHIEVEMENTS_CACHE_SIZE:
+            unlocked_achievements_cache.popitem(last=False)
+    else:
+        unlocked_achievements_cache.move_to_end(key)
+    return unlocked
+
+async def check_and_unlock_achievements(db: AsyncSession, user_id: int, counters: dict, changed_counters=None):
+    """Unlock achievements whose counter threshold is met; changed_counters limits the rules checked"""
+    unlocked = cached_unlocked_achievements(counters)
+    changed = set(changed_counters or ACHIEVEMENT_RULES)
     new_achievements = []
     
-    if len(completed_tasks) >= 1 and "first_task" not in existing_ids:
-        new_achievements.append("first_task")
-    if stats.current_streak >= 3 and "streak_3" not in existing_ids:
-        new_achievements.append("streak_3")
-    if stats.current_streak >= 7 and "streak_7" not in existing_ids:
-        new_achievements.append("streak_7")
-    if stats.total_points >= 100 and "points_100" not in existing_ids:
-        new_achievements.append("points_100")
-    if stats.total_points >= 500 and "points_500" not in existing_ids:
-        new_achievements.append("points_500")
-    if len(completed_tasks) >= 50 and "tasks_50" not in existing_ids:
-        new_achievements.append("tasks_50")
-    if len(today_completed) >= 5 and "daily_5" not in existing_ids:
-        new_achievements.append("daily_5")
-    
-    for achievement_id in new_achievements:
-        achievement = UserAchievement(user_id=user_id, achievement_id=achievement_id)
-        db.add(achievement)
-        bonus = ACHIEVEMENTS[achievement_id]["points"]
-        stats.total_points += bonus
-    
-    if new_achievements:
-        db.commit()
+    while changed:
+        candidates = [
+            achievement_id
+            for counter in changed
+            for threshold, achievement_id in ACHIEVEMENT_RULES.get(counter, [])
+            if (counters[counter] or 0) >= threshold and achievement_id not in unlocked
+        ]
+        if not candidates:
+            break
+        
+        # Confirm against the table - another worker may have unlocked some already
+        unlocked.update(await db.scalars(
+            select(UserAchievement.achievement_id).where(
+                UserAchievement.user_id == user_id,
+                UserAchievement.achievement_id.in_(candidates)
+            )
+        ))
+        fresh = [achievement_id for achievement_id in candidates if achievement_id not in unlocked]
+        if not fresh:
+            break
+        
+        # Only rows actually inserted earn a bonus, so racing requests can't award it twice
+        inserted = await insert_achievements(db, user_id, fresh)
+        unlocked.update(fresh)
+        if not inserted:
+            break
+        
+        counters = await update_user_stats(
+            db, user_id,
+            total_points=UserStats.total_points + sum(ACHIEVEMENTS[a]["points"] for a in inserted),
+            achievements_count=UserStats.achievements_count + len(inserted)
+        )
+        new_achievements.extend(inserted)
+        
+        # Bonus points can cross the next points threshold
+        changed = {"total_points"}
     
     return new_achievements
 
+async def insert_achievements(db: AsyncSession, user_id: int, achievement_ids: List[str]) -> List[str]:
+    """Insert unlock rows, skipping ones that already exist; returns the IDs inserted"""
+    now = datetime.utcnow()
+    insert = dialect_insert(db)
+    if insert:
+        rows = await db.execute(
+            insert(UserAchievement).values([
+                {"user_id": user_id, "achievement_id": achievement_id, "unlocked_at": now}
+                for achievement_id in achievement_ids
+            ]).on_conflict_do_nothing(
+                index_elements=["user_id", "achievement_id"]
+            ).returning(UserAchievement.achievement_id)
+        )
+        return [row.achievement_id for row in rows]
+    
+    inserted = []
+    for achievement_id in achievement_ids:
+        try:
+            async with db.begin_nested():
+                db.add(UserAchievement(user_id=user_id, achievement_id=achievement_id, unlocked_at=now))
+            inserted.append(achievement_id)
+        except IntegrityError:
+            pass
+    return inserted
+
 @app.post("/api/reset")
-def reset_all_data(db: Session = Depends(get_db)):
-    db.query(Task).filter(Task.user_id == DEMO_USER_ID).delete()
-    db.query(Application).filter(Application.user_id == DEMO_USER_ID).delete()
-    db.query(UserAchievement).filter(UserAchievement.user_id == DEMO_USER_ID).delete()
-    db.query(UserStats).filter(UserStats.user_id == DEMO_USER_ID).delete()
-    db.commit()
+async def reset_all_data(db: AsyncSession = Depends(get_async_db)):
+    task_ids = (await db.scalars(delete(Task).where(Task.user_id == DEMO_USER_ID).returning(Task.id))).all()
+    application_ids = (await db.scalars(
+        delete(Application).where(Application.user_id == DEMO_USER_ID).returning(Application.id)
+    )).all()
+    await db.execute(delete(UserAchievement).where(UserAchievement.user_id == DEMO_USER_ID))
+    await db.execute(delete(UserStats).where(UserStats.user_id == DEMO_USER_ID))
+    # Drop the Gmail cursor so the next sync re-imports with a full search
+    await db.execute(delete(EmailSyncState).where(EmailSyncState.user_id == DEMO_USER_ID))
+    seq = await bump_versions(db, DEMO_USER_ID, APPLICATIONS, TASKS, STATS)
+    record_deletions(db, DEMO_USER_ID, TASKS, task_ids, seq)
+    record_deletions(db, DEMO_USER_ID, APPLICATIONS, application_ids, seq)
+    await db.commit()
     return {"message": "All data reset successfully"}
 
 # ========== RESUME ROUTES ==========
@@ -725,49 +1471,55 @@ def reset_all_data(db: Session = Depends(get_db)):
 @app.post("/api/resumes/extract-text")
 async def extract_text_from_file(file: UploadFile = File(...)):
     """Extract text from uploaded PDF, TXT, or DOCX file"""
+    filename = file.filename.lower()
+    
+    if filename.endswith('.docx') or filename.endswith('.doc'):
+        return {
+            "success": False,
+            "error": "DOCX files are not yet supported. Please convert to PDF or copy-paste the text."
+        }
+    if not (filename.endswith('.txt') or filename.endswith('.pdf')):
+        return {
+            "success": False,
+            "error": "Unsupported file type. Please use PDF or TXT files."
+        }
+    
+    try:
+        upload = await spool_upload(file)
+    except UploadTooLarge as e:
+        return {"success": False, "error": str(e)}
+    
     try:
-        filename = file.filename.lower()
-        content = await file.read()
-        
         if filename.endswith('.txt'):
-            text = content.decode('utf-8')
             return {
                 "success": True,
-                "text": text,
+                "text": upload.read_bytes().decode('utf-8'),
                 "filename": file.filename
             }
         
-        elif filename.endswith('.pdf'):
-            pdf_file = io.BytesIO(content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            if not text.strip():
-                return {
-                    "success": False,
-                    "error": "Could not extract text from PDF. The PDF might be an image or protected."
-                }
-            
-            return {
-                "success": True,
-                "text": text.strip(),
-                "filename": file.filename
-            }
+        # Re-uploads of the same file skip extraction
+        result = pdf_text_extractor.cached(upload.content_hash)
+        cached = result is not None
+        if not cached:
+            result = await pdf_text_extractor.extract(upload.source)
+            if result["text"]:
+                pdf_text_extractor.remember(upload.content_hash, result)
         
-        elif filename.endswith('.docx') or filename.endswith('.doc'):
+        if not result["text"]:
             return {
                 "success": False,
-                "error": "DOCX files are not yet supported. Please convert to PDF or copy-paste the text."
+                "error": "Could not extract text from PDF. The PDF might be an image or protected."
             }
         
-        else:
-            return {
-                "success": False,
-                "error": "Unsupported file type. Please use PDF or TXT files."
-            }
+        return {
+            "success": True,
+            "text": result["text"],
+            "filename": file.filename,
+            "pages": result["pages"],
+            "truncated": result["truncated"],
+            "failed_pages": result["failed_pages"],
+            "cached": cached
+        }
     
     except Exception as e:
         print(f"Error extracting text: {e}")
@@ -775,39 +1527,73 @@ async def extract_text_from_file(file: UploadFile = File(...)):
             "success": False,
             "error": f"Failed to process file: {str(e)}"
         }
+    finally:
+        upload.cleanup()
+
+# Columns the resume list returns - content stays in the database
+RESUME_SUMMARY_COLUMNS = (
+    Resume.id, Resume.filename, Resume.content_preview, Resume.content_length,
+    Resume.uploaded_at, Resume.is_active, Resume.ats_score, Resume.ats_feedback
+)
 
-@app.get("/api/resumes", response_model=List[ResumeResponse])
-def get_resumes(db: Session = Depends(get_db)):
-    get_or_create_demo_user(db)
-    resumes = db.query(Resume).filter(
+@app.get("/api/resumes", response_model=List[ResumeSummaryResponse])
+async def get_resumes(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    if cached := await not_modified(db, request, response, DEMO_USER_ID, RESUMES):
+        return cached
+    await get_or_create_demo_user(db)
+    resumes = (await db.scalars(select(Resume).options(load_only(*RESUME_SUMMARY_COLUMNS)).where(
         Resume.user_id == DEMO_USER_ID
-    ).order_by(Resume.uploaded_at.desc()).all()
+    ).order_by(Resume.uploaded_at.desc()))).all()
     return resumes
 
+@app.get("/api/resumes/{resume_id}/content", response_model=ResumeContentResponse)
+async def get_resume_content(resume_id: int, db: AsyncSession = Depends(get_async_db)):
+    row = (await db.execute(select(Resume.id, Resume.content).where(
+        Resume.id == resume_id,
+        Resume.user_id == DEMO_USER_ID
+    ))).first()
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    
+    return row
+
 @app.post("/api/resumes", response_model=ResumeResponse)
-def create_resume(resume: ResumeCreate, db: Session = Depends(get_db)):
-    get_or_create_demo_user(db)
+async def create_resume(resume: ResumeCreate, db: AsyncSession = Depends(get_async_db)):
+    await get_or_create_demo_user(db)
     
-    db.query(Resume).filter(Resume.user_id == DEMO_USER_ID).update({"is_active": False})
+    seq = await bump_versions(db, DEMO_USER_ID, RESUMES)
+    await db.execute(update(Resume).where(
+        Resume.user_id == DEMO_USER_ID,
+        Resume.is_active == True
+    ).values(is_active=False, change_seq=seq))
     
     db_resume = Resume(
         user_id=DEMO_USER_ID,
         filename=resume.filename,
         content=resume.content,
-        is_active=True
+        content_preview=resume.content[:RESUME_PREVIEW_CHARS],
+        content_length=len(resume.content),
+        content_hash=resume_content_hash(resume.content),
+        is_active=True,
+        change_seq=seq
     )
+    # Re-uploads of already scored content get the score without another analysis
+    memo = await find_ats_result(db, DEMO_USER_ID, db_resume.content_hash)
+    if memo:
+        apply_ats_result(db_resume, db_resume.content_hash, memo)
     db.add(db_resume)
-    db.commit()
-    db.refresh(db_resume)
+    await db.commit()
+    await db.refresh(db_resume)
     return db_resume
 
 @app.get("/api/resumes/active", response_model=ResumeResponse)
-def get_active_resume(db: Session = Depends(get_db)):
-    get_or_create_demo_user(db)
-    resume = db.query(Resume).filter(
+async def get_active_resume(db: AsyncSession = Depends(get_async_db)):
+    await get_or_create_demo_user(db)
+    resume = await db.scalar(select(Resume).where(
         Resume.user_id == DEMO_USER_ID,
         Resume.is_active == True
-    ).first()
+    ))
     
     if not resume:
         raise HTTPException(status_code=404, detail="No active resume found")
@@ -815,125 +1601,216 @@ def get_active_resume(db: Session = Depends(get_db)):
     return resume
 
 @app.put("/api/resumes/{resume_id}/activate")
-def activate_resume(resume_id: int, db: Session = Depends(get_db)):
-    resume = db.query(Resume).filter(
+async def activate_resume(resume_id: int, db: AsyncSession = Depends(get_async_db)):
+    resume = await db.scalar(select(Resume).where(
         Resume.id == resume_id,
         Resume.user_id == DEMO_USER_ID
-    ).first()
+    ))
     
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
     
-    db.query(Resume).filter(Resume.user_id == DEMO_USER_ID).update({"is_active": False})
+    seq = await bump_versions(db, DEMO_USER_ID, RESUMES)
+    await db.execute(update(Resume).where(
+        Resume.user_id == DEMO_USER_ID,
+        Resume.is_active == True
+    ).values(is_active=False, change_seq=seq))
     
     resume.is_active = True
-    db.commit()
+    resume.change_seq = seq
+    await db.commit()
     
     return {"message": "Resume activated successfully"}
 
 @app.delete("/api/resumes/{resume_id}")
-def delete_resume(resume_id: int, db: Session = Depends(get_db)):
-    resume = db.query(Resume).filter(
+async def delete_resume(resume_id: int, db: AsyncSession = Depends(get_async_db)):
+    resume = await db.scalar(select(Resume).where(
         Resume.id == resume_id,
         Resume.user_id == DEMO_USER_ID
-    ).first()
+    ))
     
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
     
-    db.delete(resume)
-    db.commit()
+    await db.delete(resume)
+    seq = await bump_versions(db, DEMO_USER_ID, RESUMES)
+    record_deletions(db, DEMO_USER_ID, RESUMES, [resume_id], seq)
+    await db.commit()
     
     return {"message": "Resume deleted successfully"}
 
+def apply_ats_result(resume: Resume, content_hash: str, result: dict):
+    resume.ats_score = result["score"]
+    resume.ats_feedback = result["feedback"]
+    resume.ats_content_hash = content_hash
+
+async def find_ats_result(db: AsyncSession, user_id: int, content_hash: str) -> Optional[dict]:
+    """ATS result already computed for identical content among the user's own resumes, if any"""
+    row = (await db.execute(
+        select(Resume.ats_score, Resume.ats_feedback).where(
+            Resume.user_id == user_id,
+            Resume.ats_content_hash == content_hash,
+            Resume.ats_score.isnot(None)
+        ).limit(1)
+    )).first()
+    return {"score": row.ats_score, "feedback": row.ats_feedback} if row else None
+
 @app.post("/api/resumes/{resume_id}/analyze-ats")
-async def analyze_resume_ats(resume_id: int, db: Session = Depends(get_db)):
-    """Analyze resume using Gemini AI and calculate ATS score"""
+async def analyze_resume_ats(resume_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Analyze resume using Gemini AI and calculate ATS score (memoized by content hash)"""
     if not GEMINI_API_KEY:
         raise HTTPException(status_code=503, detail="AI service not configured")
     
-    resume = db.query(Resume).filter(
+    resume = await db.scalar(select(Resume).where(
         Resume.id == resume_id,
         Resume.user_id == DEMO_USER_ID
-    ).first()
+    ))
     
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
     
-    try:
-        ats_prompt = f"""You are an ATS (Applicant Tracking System) analyzer. Analyze this resume and provide:
-1. An ATS compatibility score from 0-100
-2. Brief feedback on what makes it ATS-friendly or not
-
-Consider:
-- Keyword optimization
-- Formatting (simple structure, no complex tables/graphics)
-- Standard section headings (Experience, Education, Skills)
-- Quantifiable achievements
-- Industry-specific keywords
-- Contact information clarity
-
-Resume Content:
-{resume.content}
-
-Respond in this exact JSON format:
-{{
-  "score": <number between 0-100>,
-  "feedback": "<2-3 sentence summary>"
-}}
-"""
-        
-        response = client.models.generate_content(
-            model="gemini-3-flash-preview",
-            contents=ats_prompt,
-            config={
-                "temperature": 0.2,
-                "max_output_tokens": 1000
+    content_hash = resume.content_hash or resume_content_hash(resume.content)
+    resume.content_hash = content_hash
+    
+    if resume.ats_score is not None and resume.ats_content_hash == content_hash:
+        return {"success": True, "score": resume.ats_score, "feedback": resume.ats_feedback, "cached": True}
+    
+    result = await find_ats_result(db, DEMO_USER_ID, content_hash)
+    cached = result is not None
+    if not cached:
+        try:
+            # Off the event loop; shielded so a disconnect doesn't cancel an analysis others may share
+            result = await asyncio.shield(asyncio.wrap_future(ats_scorer.submit(DEMO_USER_ID, content_hash, resume.content)))
+        except json.JSONDecodeError as e:
+            print(f"JSON parsing error: {e}")
+            return {
+                "success": False,
+                "error": "Failed to parse AI response"
             }
-        )
-        
-        result_text = response.text.strip()
-        print(f"🤖 Raw Gemini Response: {result_text}")
-        
-        if "```json" in result_text:
-            result_text = result_text.split("```json").split("```").strip()[1]
-        elif "```" in result_text:
-            result_text = result_text.split("```")[1].split("```")[0].strip()
-     
-        print(f"🧹 Cleaned Response: {result_text}") 
-        result = json.loads(result_text)
-        print(f"✅ Parsed Result: {result}")
+        except Exception as e:
+            print(f"Error analyzing resume: {e}")
+            raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+    
+    apply_ats_result(resume, content_hash, result)
+    resume.change_seq = await bump_versions(db, DEMO_USER_ID, RESUMES)
+    await db.commit()
+    print(f"💾 Saved ATS score {resume.ats_score} for resume {resume.id}{' (memoized)' if cached else ''}")
+    
+    return {
+        "success": True,
+        "score": resume.ats_score,
+        "feedback": resume.ats_feedback,
+        "cached": cached
+    }
+
+def run_ats_batch_job(user_id: int, progress_callback=None):
+    """Score the user's unscored resumes on a worker thread, one Gemini call per distinct content"""
+    db = SessionLocal()
+    try:
+        resumes = db.query(Resume).filter(
+            Resume.user_id == user_id,
+            Resume.ats_score.is_(None)
+        ).all()
         
-        resume.ats_score = result.get("score", 0)
-        resume.ats_feedback = result.get("feedback", "")
+        by_hash = {}
+        for resume in resumes:
+            resume.content_hash = resume.content_hash or resume_content_hash(resume.content)
+            by_hash.setdefault(resume.content_hash, []).append(resume)
+        progress = {"resumes_queued": len(resumes), "resumes_scored": 0, "memo_hits": 0, "llm_calls": 0, "errors": 0}
         
-        print(f"💾 Saving: score={resume.ats_score}, feedback={resume.ats_feedback}") 
+        # Content scored before (any of the user's resumes) is copied over in one lookup
+        memo = {
+            row.ats_content_hash: {"score": row.ats_score, "feedback": row.ats_feedback}
+            for row in db.query(Resume.ats_content_hash, Resume.ats_score, Resume.ats_feedback).filter(
+                Resume.user_id == user_id,
+                Resume.ats_content_hash.in_(by_hash),
+                Resume.ats_score.isnot(None)
+            )
+        }
+        seq = bump_versions_sync(db, user_id, RESUMES) if memo else None
+        for content_hash, result in memo.items():
+            for resume in by_hash.pop(content_hash):
+                apply_ats_result(resume, content_hash, result)
+                resume.change_seq = seq
+                progress["memo_hits"] += 1
+                progress["resumes_scored"] += 1
         db.commit()
-        db.refresh(resume)
-        print(f"✅ Database updated successfully!") 
+        if progress_callback:
+            progress_callback(progress)
         
-        return {
-            "success": True,
-            "score": resume.ats_score,
-            "feedback": resume.ats_feedback
+        futures = {
+            ats_scorer.submit(user_id, content_hash, group[0].content): content_hash
+            for content_hash, group in by_hash.items()
         }
+        progress["llm_calls"] = len(futures)
+        for future in as_completed(futures):
+            content_hash = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"ATS analysis failed for {len(by_hash[content_hash])} resume(s): {e}")
+                progress["errors"] += len(by_hash[content_hash])
+                continue
+            
+            seq = bump_versions_sync(db, user_id, RESUMES)
+            for resume in by_hash[content_hash]:
+                apply_ats_result(resume, content_hash, result)
+                resume.change_seq = seq
+                progress["resumes_scored"] += 1
+            db.commit()
+            if progress_callback:
+                progress_callback(progress)
         
-    except json.JSONDecodeError as e:
-        print(f"JSON parsing error: {e}")
-        print(f"Response text: {response.text}")
-        return {
-            "success": False,
-            "error": "Failed to parse AI response"
-        }
-    except Exception as e:
-        print(f"Error analyzing resume: {e}")
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+        return progress
+    finally:
+        db.close()
+
+@app.post("/api/resumes/analyze-ats/batch", status_code=202)
+async def analyze_resumes_ats_batch():
+    """Queue ATS scoring of every unscored resume (joins the running batch for this user)"""
+    if not GEMINI_API_KEY:
+        raise HTTPException(status_code=503, detail="AI service not configured")
+    
+    job, created = await anyio.to_thread.run_sync(
+        ats_job_manager.submit, DEMO_USER_ID, run_ats_batch_job, DEMO_USER_ID
+    )
+    return {**job.to_dict(), "deduplicated": not created}
+
+@app.get("/api/resumes/analyze-ats/jobs/{job_id}")
+def get_ats_batch_job(job_id: str):
+    """Get progress of a background ATS batch job"""
+    job = ats_job_manager.get(job_id)
+    if not job or job.user_id != DEMO_USER_ID:
+        raise HTTPException(status_code=404, detail="ATS job not found")
+    return job.to_dict()
 
 # ========== EMAIL SYNC ROUTES ==========
 
-@app.post("/api/email/sync")
-async def sync_emails(request: EmailSyncRequest, db: Session = Depends(get_db)):
-    """Sync job emails from Gmail"""
+def run_email_sync_job(user_id: int, request: EmailSyncRequest, progress_callback=None):
+    """Run one email sync on a worker thread with its own DB session"""
+    db = SessionLocal()
+    try:
+        return email_sync_service.sync_emails(
+            db_session=db,
+            user_id=user_id,
+            days_back=request.days_back,
+            use_ai=request.use_ai,
+            Application=Application,
+            EmailSyncLog=EmailSyncLog,
+            EmailSyncState=EmailSyncState,
+            EmailClassification=EmailClassification,
+            full_sync=request.full_sync,
+            progress_callback=progress_callback,
+            record_changes=lambda session, applications_changed: bump_versions_sync(
+                session, user_id, *((APPLICATIONS, SYNC_LOGS) if applications_changed else (SYNC_LOGS,))
+            )
+        )
+    finally:
+        db.close()
+
+@app.post("/api/email/sync", status_code=202)
+async def sync_emails(request: EmailSyncRequest, db: AsyncSession = Depends(get_async_db)):
+    """Start a background Gmail sync (joins the running one for this user)"""
     
     if not email_sync_service:
         raise HTTPException(
@@ -941,41 +1818,216 @@ async def sync_emails(request: EmailSyncRequest, db: Session = Depends(get_db)):
             detail="Email sync not configured. Add GEMINI_API_KEY to .env"
         )
     
-    get_or_create_demo_user(db)
+    await get_or_create_demo_user(db)
     
-    try:
-        result = email_sync_service.sync_emails(
-            db_session=db,
-            user_id=DEMO_USER_ID,
-            days_back=request.days_back,
-            use_ai=request.use_ai,
-            Application=Application,
-            EmailSyncLog=EmailSyncLog
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    job, created = await anyio.to_thread.run_sync(
+        sync_job_manager.submit, DEMO_USER_ID, run_email_sync_job, DEMO_USER_ID, request
+    )
+    return {**job.to_dict(), "deduplicated": not created}
+
+@app.get("/api/email/sync/jobs/{job_id}")
+def get_sync_job(job_id: str):
+    """Get progress of a background email sync job"""
+    job = sync_job_manager.get(job_id)
+    if not job or job.user_id != DEMO_USER_ID:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return job.to_dict()
 
 @app.get("/api/email/sync-status")
-def get_sync_status(db: Session = Depends(get_db)):
+async def get_sync_status(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
     """Get last email sync status"""
-    get_or_create_demo_user(db)
-    
-    last_sync = db.query(EmailSyncLog).filter(
+    active_job = await anyio.to_thread.run_sync(sync_job_manager.get_active, DEMO_USER_ID)
+    active_job_id = active_job.job_id if active_job else None
+    
+    # A job starting or finishing changes the reply before any log row is written
+    extra = f"{active_job_id}:{active_job.status}" if active_job else ""
+    if cached := await not_modified(db, request, response, DEMO_USER_ID, SYNC_LOGS, extra):
+        return cached
+    await get_or_create_demo_user(db)
+    return await load_sync_status(db, active_job_id)
+
+async def load_sync_status(db: AsyncSession, active_job_id: Optional[str]) -> dict:
+    last_sync = await db.scalar(select(EmailSyncLog).where(
         EmailSyncLog.user_id == DEMO_USER_ID
-    ).order_by(EmailSyncLog.created_at.desc()).first()
+    ).order_by(EmailSyncLog.created_at.desc()).limit(1))
     
     if not last_sync:
-        return {"last_sync": None, "status": "never_synced"}
+        return {"last_sync": None, "status": "never_synced", "active_job_id": active_job_id}
     
     return {
         "last_sync": last_sync.created_at,
         "emails_processed": last_sync.emails_processed,
         "applications_added": last_sync.applications_added,
         "applications_updated": last_sync.applications_updated,
-        "status": last_sync.status
+        "status": last_sync.status,
+        "active_job_id": active_job_id
     }
 
+@app.get("/api/email/classification-cache")
+def get_classification_cache_stats():
+    """Get hit/miss counters for the email classification cache"""
+    if not email_sync_service:
+        raise HTTPException(status_code=503, detail="Email sync not configured")
+    return email_sync_service.classification_cache.stats()
+
+# ========== CHANGE FEED ROUTES ==========
+
+# Collections /api/changes reports: model, response schema, columns loaded
+CHANGE_COLLECTIONS = {
+    APPLICATIONS: (Application, ApplicationResponse, None),
+    TASKS: (Task, TaskResponse, None),
+    RESUMES: (Resume, ResumeSummaryResponse, RESUME_SUMMARY_COLUMNS)
+}
+
+@app.get("/api/changes")
+async def get_changes(
+    since: Optional[int] = Query(None, ge=0, description="Cursor from the previous call"),
+    collections: Optional[str] = Query(None, description="Comma-separated subset of applications,tasks,resumes"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Applications, tasks and resumes created, updated or deleted after a cursor
+    
+    Without `since` (or with a cursor this database never issued) every row is
+    returned with full=true and the client replaces its cache. Otherwise only
+    rows stamped after `since` come back, plus the IDs deleted since. Pass the
+    returned cursor as `since` next time.
+    """
+    names = [name.strip() for name in collections.split(",")] if collections else list(CHANGE_COLLECTIONS)
+    unknown = [name for name in names if name not in CHANGE_COLLECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown collection(s): {', '.join(unknown)}")
+    
+    # Read the cursor before the rows - a write committing in between is only sent twice, never missed
+    cursor = await current_change_cursor(db, DEMO_USER_ID)
+    full = since is None or since > cursor
+    result = {"cursor": cursor, "full": full}
+    if not full and since == cursor:
+        return {**result, **{name: {"changed": [], "deleted": []} for name in names}}
+    
+    deleted = {}
+    if not full:
+        for row in await db.execute(select(DeletedRecord.collection, DeletedRecord.record_id).where(
+            DeletedRecord.user_id == DEMO_USER_ID,
+            DeletedRecord.change_seq > since
+        )):
+            deleted.setdefault(row.collection, set()).add(row.record_id)
+    
+    for name in names:
+        model, schema, columns = CHANGE_COLLECTIONS[name]
+        query = select(model).where(model.user_id == DEMO_USER_ID)
+        if columns:
+            query = query.options(load_only(*columns))
+        if not full:
+            query = query.where(model.change_seq > since)
+        rows = (await db.scalars(query)).all()
+        
+        # An ID can come back after a delete (SQLite reuses the highest rowid) - the live row wins
+        live = {row.id for row in rows}
+        result[name] = {
+            "changed": [schema.model_validate(row) for row in rows],
+            "deleted": sorted(deleted.get(name, set()) - live)
+        }
+    return result
+
+@app.get("/api/events")
+async def stream_events(request: Request, last_event_id: Optional[str] = None):
+    """
+    Server-Sent Events stream of the user's changes (replaces polling)
+    
+    Events are named after the changed collection (applications, tasks, stats,
+    resumes, sync_logs) with its new version, plus sync_status with the email
+    sync job and resync when the client must refetch everything. Reconnects
+    resume from the Last-Event-ID header (or ?last_event_id=).
+    """
+    return StreamingResponse(
+        change_bus.stream(DEMO_USER_ID, request.headers.get("last-event-id") or last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/events/stats")
+def get_change_feed_stats():
+    """Get subscriber and delivery counters for the change feed"""
+    return change_bus.stats()
+
+# ========== DASHBOARD ROUTES ==========
+
+# List sections return their first page; next_cursor continues on the matching list route
+async def load_dashboard_applications(db: AsyncSession) -> dict:
+    rows, next_cursor = await fetch_page(
+        db, select(Application).where(Application.user_id == DEMO_USER_ID), Application, None, DEFAULT_PAGE_SIZE
+    )
+    return {"items": [ApplicationResponse.model_validate(row) for row in rows], "next_cursor": next_cursor}
+
+async def load_dashboard_tasks(db: AsyncSession) -> dict:
+    rows, next_cursor = await fetch_page(
+        db, select(Task).where(Task.user_id == DEMO_USER_ID), Task, None, DEFAULT_PAGE_SIZE
+    )
+    return {"items": [TaskResponse.model_validate(row) for row in rows], "next_cursor": next_cursor}
+
+async def load_dashboard_sync_status(db: AsyncSession) -> dict:
+    active_job = await anyio.to_thread.run_sync(sync_job_manager.get_active, DEMO_USER_ID)
+    return await load_sync_status(db, active_job.job_id if active_job else None)
+
+# Sections /api/dashboard can return - each runs on its own session, concurrently
+DASHBOARD_SECTIONS = {
+    "applications": load_dashboard_applications,
+    "tasks": load_dashboard_tasks,
+    "stats": load_stats,
+    "achievements": load_achievements,
+    "sync_status": load_dashboard_sync_status
+}
+
+# Connections dashboard sections may hold at once, across all dashboard requests in this worker -
+# keeps a burst of page loads from draining the pool the other routes share
+DASHBOARD_CONCURRENCY = int(os.getenv("DASHBOARD_CONCURRENCY", str(max(1, DB_POOL_SIZE // 2))))
+dashboard_sessions = asyncio.Semaphore(DASHBOARD_CONCURRENCY)
+
+async def run_dashboard_section(name: str) -> Tuple[object, float]:
+    # Timed from the first query, so time spent queued for a session shows up in total only
+    async with dashboard_sessions:
+        started = perf_counter()
+        async with AsyncSessionLocal() as db:
+            result = await DASHBOARD_SECTIONS[name](db)
+        return result, (perf_counter() - started) * 1000
+
+@app.get("/api/dashboard")
+async def get_dashboard(
+    response: Response,
+    sections: Optional[str] = Query(None, description="Comma-separated subset of applications,tasks,stats,achievements,sync_status")
+):
+    """
+    Everything the dashboard pages load, in one request
+    
+    The requested sections are queried concurrently, one session each (at most
+    DASHBOARD_CONCURRENCY sessions per worker), and timed in the Server-Timing header. change_cursor is read before any
+    section, so it can seed /api/changes without missing a write.
+    
+    applications and tasks hold their first page as {"items", "next_cursor"};
+    the rest come from /api/applications or /api/tasks with that cursor.
+    """
+    names = [name.strip() for name in sections.split(",")] if sections else list(DASHBOARD_SECTIONS)
+    unknown = [name for name in names if name not in DASHBOARD_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown section(s): {', '.join(unknown)}")
+    names = list(dict.fromkeys(names))
+    
+    started = perf_counter()
+    async with AsyncSessionLocal() as db:
+        await get_or_create_demo_user(db)
+        cursor = await current_change_cursor(db, DEMO_USER_ID)
+    setup_ms = (perf_counter() - started) * 1000
+    
+    results = await asyncio.gather(*[run_dashboard_section(name) for name in names])
+    
+    timings = [f"setup;dur={setup_ms:.1f}"] + [
+        f"{name};dur={duration:.1f}" for name, (_, duration) in zip(names, results)
+    ] + [f"total;dur={(perf_counter() - started) * 1000:.1f}"]
+    response.headers["Server-Timing"] = ", ".join(timings)
+    
+    return {"change_cursor": cursor, **{name: result for name, (result, _) in zip(names, results)}}
+
 # ==================== RUN SERVER ====================
 
 if __name__ == "__main__":
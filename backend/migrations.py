@@ -0,0 +1,278 @@
+"""
+Schema Migration Module for JobTracker
+Versioned schema changes applied at startup, on top of Base.metadata.create_all
+
+create_all only creates missing tables - it never adds indexes or columns to
+tables that already exist. Each migration below runs once per database, in
+order, and is recorded in the schema_migrations table.
+
+Usage:
+    python migrations.py            # apply pending migrations
+    python migrations.py --explain  # also check hot queries use an index
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple, Union
+
+from sqlalchemy import inspect, text
+
+# A step is raw SQL or a callable taking the connection
+Step = Union[str, Callable]
+
+
+def add_column(table: str, column: str, ddl: str) -> Callable:
+    """
+    Step adding a column if it doesn't exist (SQLite has no ADD COLUMN IF NOT EXISTS)
+
+    Args:
+        table: Table name
+        column: Column name
+        ddl: Column type and options, e.g. "INTEGER DEFAULT 0"
+
+    Returns:
+        Migration step
+    """
+    def step(conn):
+        existing = {c["name"] for c in inspect(conn).get_columns(table)}
+        if column not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return step
+
+
+def backfill_resume_hashes(conn):
+    """Hash existing resumes; scores already stored were computed for their current content"""
+    from ats_scoring import resume_content_hash
+
+    rows = conn.execute(text("SELECT id, content, ats_score FROM resumes WHERE content_hash IS NULL")).all()
+    for row in rows:
+        content_hash = resume_content_hash(row.content)
+        conn.execute(
+            text("UPDATE resumes SET content_hash = :hash, ats_content_hash = :ats_hash WHERE id = :id"),
+            {"hash": content_hash, "ats_hash": content_hash if row.ats_score is not None else None, "id": row.id}
+        )
+
+
+def backfill_resume_previews(conn):
+    """Fill the list columns from existing content (which may be gzipped)"""
+    from text_compression import decompress_text
+
+    rows = conn.execute(text("SELECT id, content FROM resumes WHERE content_length IS NULL")).all()
+    for row in rows:
+        content = decompress_text(row.content) or ""
+        conn.execute(
+            text("UPDATE resumes SET content_preview = :preview, content_length = :length WHERE id = :id"),
+            {"preview": content[:150], "length": len(content), "id": row.id}
+        )
+
+
+def backup_duplicate_imports(conn):
+    """
+    Move all but the oldest email-imported row of each (user_id, company, position)
+    into applications_duplicate_backup, so the scoped unique index can be built
+    """
+    losers = (
+        "SELECT * FROM applications WHERE email_message_id IS NOT NULL AND id NOT IN ("
+        "SELECT MIN(id) FROM applications WHERE email_message_id IS NOT NULL "
+        "GROUP BY user_id, company, position)"
+    )
+    count = conn.execute(text(f"SELECT COUNT(*) FROM ({losers}) AS duplicates")).scalar()
+    if not count:
+        return
+
+    if not inspect(conn).has_table("applications_duplicate_backup"):
+        conn.execute(text(f"CREATE TABLE applications_duplicate_backup AS {losers}"))
+    else:
+        conn.execute(text(f"INSERT INTO applications_duplicate_backup {losers}"))
+    conn.execute(text(f"DELETE FROM applications WHERE id IN (SELECT id FROM ({losers}) AS duplicates)"))
+    print(f"⚠️  Moved {count} duplicate imported application(s) to applications_duplicate_backup")
+
+
+# (version, description, steps) - append only, never edit an applied migration
+MIGRATIONS: List[Tuple[int, str, List[Step]]] = [
+    (1, "Composite (user_id, sort key) indexes for list routes", [
+        "CREATE INDEX IF NOT EXISTS ix_applications_user_created ON applications (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_user_created ON tasks (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_resumes_user_uploaded ON resumes (user_id, uploaded_at)",
+        "CREATE INDEX IF NOT EXISTS ix_email_sync_logs_user_created ON email_sync_logs (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_user_achievements_user ON user_achievements (user_id)",
+    ]),
+    (2, "Unique (user_id, company, position) backing the email import upsert", [
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_applications_user_company_position "
+        "ON applications (user_id, company, position)",
+    ]),
+    (3, "Task and achievement counters on user_stats", [
+        add_column("user_stats", "total_tasks", "INTEGER DEFAULT 0"),
+        add_column("user_stats", "completed_tasks", "INTEGER DEFAULT 0"),
+        add_column("user_stats", "today_completed", "INTEGER DEFAULT 0"),
+        add_column("user_stats", "today_date", "VARCHAR"),
+        add_column("user_stats", "achievements_count", "INTEGER DEFAULT 0"),
+        # Left null so existing rows are recounted on their next read
+        add_column("user_stats", "counters_reconciled_at", "TIMESTAMP"),
+    ]),
+    (4, "Unique (user_id, achievement_id) so an achievement unlocks once", [
+        "DELETE FROM user_achievements WHERE id NOT IN "
+        "(SELECT MIN(id) FROM user_achievements GROUP BY user_id, achievement_id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_user_achievements_user_achievement "
+        "ON user_achievements (user_id, achievement_id)",
+    ]),
+    (5, "Resume content hashes for memoized ATS scoring", [
+        add_column("resumes", "content_hash", "VARCHAR(64)"),
+        add_column("resumes", "ats_content_hash", "VARCHAR(64)"),
+        "CREATE INDEX IF NOT EXISTS ix_resumes_ats_content_hash ON resumes (ats_content_hash)",
+        backfill_resume_hashes,
+    ]),
+    (6, "Resume preview and length for the content-free resume list", [
+        add_column("resumes", "content_preview", "VARCHAR"),
+        add_column("resumes", "content_length", "INTEGER"),
+        backfill_resume_previews,
+    ]),
+    (7, "Change sequence stamps for the /api/changes delta sync", [
+        add_column("applications", "change_seq", "INTEGER"),
+        add_column("tasks", "change_seq", "INTEGER"),
+        add_column("resumes", "change_seq", "INTEGER"),
+        "CREATE INDEX IF NOT EXISTS ix_applications_user_change_seq ON applications (user_id, change_seq)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_user_change_seq ON tasks (user_id, change_seq)",
+        "CREATE INDEX IF NOT EXISTS ix_resumes_user_change_seq ON resumes (user_id, change_seq)",
+    ]),
+    (8, "Resumable mailbox scan position on email_sync_state", [
+        add_column("email_sync_state", "scan_query", "VARCHAR"),
+        add_column("email_sync_state", "scan_page_token", "VARCHAR"),
+        add_column("email_sync_state", "scan_history_id", "VARCHAR"),
+    ]),
+    (9, "Scope the (user_id, company, position) unique index to email-imported applications", [
+        "DROP INDEX IF EXISTS uq_applications_user_company_position",
+        backup_duplicate_imports,
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_applications_user_company_position_imported "
+        "ON applications (user_id, company, position) WHERE email_message_id IS NOT NULL",
+    ]),
+    (10, "Mailbox window covered by finished scans, for stopping later scans early", [
+        add_column("email_sync_state", "scan_covered_after", "VARCHAR"),
+    ]),
+    (11, "Failed Gmail messages retried by ID instead of holding back the history cursor", [
+        add_column("email_sync_state", "retry_message_ids", "VARCHAR"),
+    ]),
+]
+
+# Pending migrations a later one replaces - recorded without running on databases that haven't applied them
+# (2 fails on manually added duplicates, which 9 leaves alone)
+SUPERSEDED: Dict[int, int] = {2: 9}
+
+# Query shapes served by the list routes, checked by explain_hot_queries
+HOT_QUERIES: Dict[str, str] = {
+    "get_applications": "SELECT * FROM applications WHERE user_id = :user_id ORDER BY created_at DESC",
+    "get_tasks": "SELECT * FROM tasks WHERE user_id = :user_id ORDER BY created_at DESC",
+    "get_resumes": "SELECT * FROM resumes WHERE user_id = :user_id ORDER BY uploaded_at DESC",
+    "get_sync_status": "SELECT * FROM email_sync_logs WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 1",
+    "get_achievements": "SELECT * FROM user_achievements WHERE user_id = :user_id",
+    "get_changes": "SELECT * FROM applications WHERE user_id = :user_id AND change_seq > 0",
+    "get_changes_deleted": "SELECT * FROM deleted_records WHERE user_id = :user_id AND change_seq > 0",
+}
+
+
+def run_migrations(engine) -> List[int]:
+    """
+    Apply pending migrations, each in its own transaction
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        Versions applied by this call
+    """
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, description VARCHAR, applied_at TIMESTAMP)"
+        ))
+
+    applied = []
+    for version, description, steps in MIGRATIONS:
+        with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                # Serialize workers starting at the same time
+                conn.execute(text("SELECT pg_advisory_xact_lock(724301)"))
+
+            done = conn.execute(
+                text("SELECT 1 FROM schema_migrations WHERE version = :version"),
+                {"version": version}
+            ).first()
+            if done:
+                continue
+
+            if version in SUPERSEDED:
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, description, applied_at) "
+                         "VALUES (:version, :description, :applied_at)"),
+                    {"version": version, "description": f"{description} (superseded by {SUPERSEDED[version]})",
+                     "applied_at": datetime.utcnow()}
+                )
+                print(f"⏭️  Skipped migration {version}: superseded by {SUPERSEDED[version]}")
+                continue
+
+            try:
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(text(step))
+            except Exception as e:
+                # Later migrations may depend on this one, so stop here
+                print(f"❌ Migration {version} ({description}) failed: {e}")
+                raise
+
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) "
+                     "VALUES (:version, :description, :applied_at)"),
+                {"version": version, "description": description, "applied_at": datetime.utcnow()}
+            )
+            print(f"✅ Applied migration {version}: {description}")
+            applied.append(version)
+
+    return applied
+
+
+def explain_hot_queries(engine, user_id: int = 1) -> Dict[str, Dict]:
+    """
+    EXPLAIN each hot query and check it is served by an index without a sort
+
+    On PostgreSQL sequential and bitmap scans are disabled for the check,
+    since the planner prefers them (plus a sort) on small tables even when
+    an index could serve the query in order.
+
+    Args:
+        engine: SQLAlchemy engine
+        user_id: User ID bound into the queries
+
+    Returns:
+        Dict of route name -> {"plan": str, "uses_index": bool}
+    """
+    results = {}
+    with engine.connect() as conn:
+        for name, query in HOT_QUERIES.items():
+            if engine.dialect.name == "postgresql":
+                with conn.begin():
+                    conn.execute(text("SET LOCAL enable_seqscan = off"))
+                    conn.execute(text("SET LOCAL enable_bitmapscan = off"))
+                    rows = conn.execute(text(f"EXPLAIN {query}"), {"user_id": user_id}).all()
+                plan = "\n".join(row[0] for row in rows)
+                uses_index = "Index" in plan and "Sort" not in plan
+            else:
+                rows = conn.execute(text(f"EXPLAIN QUERY PLAN {query}"), {"user_id": user_id}).all()
+                plan = "\n".join(row[-1] for row in rows)
+                uses_index = "USING INDEX" in plan and "TEMP B-TREE" not in plan
+            results[name] = {"plan": plan, "uses_index": uses_index}
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    from main import engine, Base
+
+    Base.metadata.create_all(bind=engine)
+    applied = run_migrations(engine)
+    print(f"📦 {len(applied)} migration(s) applied")
+
+    if "--explain" in sys.argv:
+        for name, result in explain_hot_queries(engine).items():
+            print(f"{'✅' if result['uses_index'] else '❌'} {name}")
+            print("    " + result["plan"].replace("\n", "\n    "))
@@ -0,0 +1,273 @@
+"""
+PDF Extraction Module for JobTracker
+Spools uploads to disk, extracts PDF pages on a process pool and caches text by file hash
+"""
+
+import io
+import os
+import signal
+import asyncio
+import hashlib
+import tempfile
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, List, Tuple, Union
+
+import PyPDF2
+
+# Upload and extraction limits
+MAX_UPLOAD_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+SPOOL_THRESHOLD_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 64 * 1024
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_PAGE_TIMEOUT = float(os.getenv("PDF_PAGE_TIMEOUT", "5"))
+PDF_PAGES_PER_TASK = 10
+PDF_TEXT_CACHE_SIZE = int(os.getenv("PDF_TEXT_CACHE_SIZE", "100"))
+
+# Bytes for uploads under the spool threshold, a temp file path above it
+PdfSource = Union[bytes, str]
+
+
+class UploadTooLarge(Exception):
+    """Upload exceeded MAX_UPLOAD_BYTES"""
+
+
+class SpooledUpload:
+    """An upload read in chunks - kept in memory when small, written to a temp file when large"""
+
+    def __init__(self):
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.path: Optional[str] = None
+        self._buffer = io.BytesIO()
+        self._file = None
+
+    @property
+    def content_hash(self) -> str:
+        return self.sha256.hexdigest()
+
+    @property
+    def source(self) -> PdfSource:
+        """What the extraction workers read - bytes, or the temp file path"""
+        return self.path or self._buffer.getvalue()
+
+    def read_bytes(self) -> bytes:
+        if self.path:
+            with open(self.path, "rb") as f:
+                return f.read()
+        return self._buffer.getvalue()
+
+    def write(self, chunk: bytes):
+        self.sha256.update(chunk)
+        self.size += len(chunk)
+        if self._file is None and self.size > SPOOL_THRESHOLD_BYTES:
+            # Roll over to a named file so worker processes can open it
+            self._file = tempfile.NamedTemporaryFile(prefix="upload-", suffix=".pdf", delete=False)
+            self.path = self._file.name
+            self._file.write(self._buffer.getvalue())
+            self._buffer = io.BytesIO()
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._buffer.write(chunk)
+
+    def finish(self):
+        if self._file is not None:
+            self._file.close()
+
+    def cleanup(self):
+        if self._file is not None:
+            self._file.close()
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+async def spool_upload(upload, max_bytes: int = MAX_UPLOAD_BYTES) -> SpooledUpload:
+    """
+    Read an UploadFile in chunks, hashing as it goes
+
+    Args:
+        upload: FastAPI UploadFile
+        max_bytes: Largest upload accepted
+
+    Returns:
+        SpooledUpload (caller must cleanup())
+
+    Raises:
+        UploadTooLarge: If the upload is bigger than max_bytes
+    """
+    spooled = SpooledUpload()
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            if spooled.size + len(chunk) > max_bytes:
+                raise UploadTooLarge(f"File is larger than the {max_bytes / (1024 * 1024):g} MB limit")
+            spooled.write(chunk)
+        spooled.finish()
+        return spooled
+    except BaseException:
+        spooled.cleanup()
+        raise
+
+
+# ---- Worker process functions (must stay importable at module level) ----
+
+class PageTimeout(Exception):
+    pass
+
+
+def _raise_page_timeout(signum, frame):
+    raise PageTimeout()
+
+
+def _open_reader(source: PdfSource) -> PyPDF2.PdfReader:
+    return PyPDF2.PdfReader(source if isinstance(source, str) else io.BytesIO(source))
+
+
+def count_pages(source: PdfSource) -> int:
+    return len(_open_reader(source).pages)
+
+
+def extract_page_range(source: PdfSource, start: int, stop: int, page_timeout: float) -> List[Tuple[int, Optional[str]]]:
+    """
+    Extract pages [start, stop) in a worker process
+
+    Each page gets page_timeout seconds (via SIGALRM where available); pages that
+    time out or fail come back as None so the rest of the document still extracts.
+    """
+    reader = _open_reader(source)
+    use_alarm = page_timeout > 0 and hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_page_timeout)
+
+    pages = []
+    for number in range(start, stop):
+        try:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, page_timeout)
+            pages.append((number, reader.pages[number].extract_text() or ""))
+        except Exception:
+            pages.append((number, None))
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    return pages
+
+
+# ---- Event loop side ----
+
+class PdfTextExtractor:
+    """Extracts PDF text on a process pool, caching results by file hash"""
+
+    def __init__(self, max_workers: int = 2, max_pages: int = PDF_MAX_PAGES,
+                 page_timeout: float = PDF_PAGE_TIMEOUT, cache_size: int = PDF_TEXT_CACHE_SIZE):
+        """
+        Initialize PDF text extractor
+
+        Args:
+            max_workers: Worker processes parsing PDFs
+            max_pages: Pages extracted per document; the rest are skipped
+            page_timeout: Seconds allowed per page
+            cache_size: Extraction results kept in the LRU
+        """
+        self.max_workers = max_workers
+        self.max_pages = max_pages
+        self.page_timeout = page_timeout
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        # Created on first use; spawn, since forking a process full of threads isn't safe
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def cached(self, content_hash: str) -> Optional[Dict]:
+        with self._lock:
+            result = self._cache.get(content_hash)
+            if result is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(content_hash)
+            self.hits += 1
+            return result
+
+    def remember(self, content_hash: str, result: Dict):
+        with self._lock:
+            self._cache[content_hash] = result
+            self._cache.move_to_end(content_hash)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def extract(self, source: PdfSource) -> Dict:
+        """
+        Extract text from a PDF without blocking the event loop
+
+        Args:
+            source: PDF bytes or path to a PDF file
+
+        Returns:
+            Dict with text, pages (total), pages_extracted, failed_pages and truncated
+        """
+        loop = asyncio.get_running_loop()
+        total = await loop.run_in_executor(self.pool, count_pages, source)
+        last = min(total, self.max_pages)
+
+        ranges = [(start, min(start + PDF_PAGES_PER_TASK, last)) for start in range(0, last, PDF_PAGES_PER_TASK)]
+        results = await asyncio.gather(*[
+            asyncio.wait_for(
+                loop.run_in_executor(self.pool, extract_page_range, source, start, stop, self.page_timeout),
+                # Backstop for platforms without SIGALRM
+                timeout=self.page_timeout * (stop - start) + 10
+            )
+            for start, stop in ranges
+        ])
+
+        pages = sorted(page for chunk in results for page in chunk)
+        return {
+            "text": "\n".join(text for _, text in pages if text).strip(),
+            "pages": total,
+            "pages_extracted": sum(1 for _, text in pages if text is not None),
+            "failed_pages": [number + 1 for number, text in pages if text is None],
+            "truncated": total > last
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "entries": len(self._cache)
+            }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Convenience function for easy import
+def create_pdf_text_extractor(max_workers: int = 2) -> PdfTextExtractor:
+    """
+    Create a PdfTextExtractor instance
+
+    Args:
+        max_workers: Worker processes parsing PDFs
+
+    Returns:
+        PdfTextExtractor instance
+    """
+    return PdfTextExtractor(max_workers=max_workers)
@@ -0,0 +1,225 @@
+"""
+Prompt Builder Module for JobTracker
+Builds AI assistant prompts within a per-model token budget, folding older turns into a rolling summary
+"""
+
+import os
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, List, Callable, Awaitable, Tuple
+
+from rate_limiter import estimate_tokens
+
+# Input token budget per model (system prompt + summary + recent turns + message)
+MODEL_TOKEN_BUDGETS = {
+    "gemini-3-pro-preview": int(os.getenv("AI_PRO_PROMPT_TOKENS", "12000")),
+    "gemini-3-flash-preview": int(os.getenv("AI_FLASH_PROMPT_TOKENS", "8000")),
+}
+DEFAULT_TOKEN_BUDGET = 8000
+
+MESSAGE_BUDGET_SHARE = 0.6   # Most of the budget the new message alone may take
+MAX_RECENT_TURNS = 6         # Turns kept verbatim, newest first, while they fit
+TURN_MAX_TOKENS = 1500       # A single earlier turn is truncated past this
+SUMMARY_MAX_TOKENS = 400     # Rolling summary of the turns before the recent ones
+EXTRACT_CHARS_PER_TURN = 200 # Per-turn excerpt used until an LLM summary is cached
+SUMMARY_CACHE_SIZE = int(os.getenv("AI_SUMMARY_CACHE_SIZE", "500"))
+
+# Async callable turning conversation text into a summary
+Summarizer = Callable[[str, int], Awaitable[str]]
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """
+    Cut text to about max_tokens, keeping the start and the end
+
+    Pasted job descriptions and resumes carry the important parts at both
+    ends, so the middle is dropped and marked.
+
+    Args:
+        text: Text to fit
+        max_tokens: Token allowance
+
+    Returns:
+        (text, truncated)
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text, False
+
+    max_chars = max(0, max_tokens * 4 - 40)
+    head = text[:max_chars * 2 // 3]
+    tail = text[len(text) - max_chars // 3:] if max_chars // 3 else ""
+    omitted = len(text) - len(head) - len(tail)
+    return f"{head}\n[... {omitted} characters omitted ...]\n{tail}", True
+
+
+def format_turn(turn: Dict) -> str:
+    return f"{'User' if turn.get('role') == 'user' else 'Assistant'}: {turn.get('content', '')}"
+
+
+def excerpt(turn: Dict) -> str:
+    """Opening of a turn, whitespace collapsed - stands in until an LLM summary exists"""
+    text = " ".join(format_turn(turn).split())
+    return text if len(text) <= EXTRACT_CHARS_PER_TURN else text[:EXTRACT_CHARS_PER_TURN] + "..."
+
+
+class BuiltPrompt:
+    """A prompt fitted to the budget - as one flat string, or as parts for a multi-turn request"""
+
+    def __init__(self, system_prompt: str, summary: Optional[str], turns: List[Dict], message: str,
+                 budget: int, truncated_message: bool, summarized_turns: int):
+        self.system_prompt = system_prompt
+        self.summary = summary
+        self.turns = turns  # Recent turns kept, each capped at TURN_MAX_TOKENS
+        self.message = message
+        self.budget = budget
+        self.truncated_message = truncated_message
+        self.summarized_turns = summarized_turns
+
+    @property
+    def system_instruction(self) -> str:
+        """System prompt plus the summary of turns that didn't fit"""
+        if self.summary is None:
+            return self.system_prompt
+        return f"{self.system_prompt}\n\nSummary of earlier conversation:\n{self.summary}"
+
+    @property
+    def text(self) -> str:
+        sections = [self.system_instruction]
+        if self.turns:
+            sections.append("Previous conversation:\n" + "\n".join(format_turn(turn) for turn in self.turns))
+        sections.append(f"User: {self.message}")
+        return "\n\n".join(sections)
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+
+class PromptBuilder:
+    """Fits system prompt, history and message into a model's budget; caches rolling summaries"""
+
+    def __init__(self, summarizer: Optional[Summarizer] = None, cache_size: int = SUMMARY_CACHE_SIZE):
+        """
+        Initialize prompt builder
+
+        Args:
+            summarizer: Async LLM summarizer; without one older turns are excerpted
+            cache_size: Rolling summaries kept in the LRU
+        """
+        self.summarizer = summarizer
+        self.cache_size = cache_size
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+    def build(self, model: str, system_prompt: str, message: str, history: Optional[List[Dict]] = None,
+              max_recent_turns: int = MAX_RECENT_TURNS) -> BuiltPrompt:
+        """
+        Build the prompt for one chat turn - never waits on the summarizer
+
+        Args:
+            model: Gemini model the prompt is for
+            system_prompt: Tool instructions
+            message: New user message
+            history: Earlier turns ({"role", "content"}), oldest first
+            max_recent_turns: Turns that may be kept verbatim (budget permitting)
+
+        Returns:
+            BuiltPrompt
+        """
+        history = history or []
+        budget = MODEL_TOKEN_BUDGETS.get(model, DEFAULT_TOKEN_BUDGET)
+        message, truncated_message = truncate_to_tokens(message, int(budget * MESSAGE_BUDGET_SHARE))
+        remaining = budget - estimate_tokens(system_prompt) - estimate_tokens(message) - SUMMARY_MAX_TOKENS
+
+        # Newest turns verbatim while they fit; everything older goes into the summary
+        recent = []
+        for turn in reversed(history[-max_recent_turns:]):
+            content, _ = truncate_to_tokens(turn.get('content', ''), TURN_MAX_TOKENS)
+            cost = estimate_tokens(content)
+            if cost > remaining:
+                break
+            recent.insert(0, {"role": turn.get('role'), "content": content})
+            remaining -= cost
+        older = history[:len(history) - len(recent)]
+
+        return BuiltPrompt(
+            system_prompt=system_prompt,
+            summary=self.summary_for(older) if older else None,
+            turns=recent,
+            message=message,
+            budget=budget,
+            truncated_message=truncated_message,
+            summarized_turns=len(older)
+        )
+
+    def summary_for(self, turns: List[Dict]) -> str:
+        """
+        Rolling summary of `turns` from the cache, topped up with excerpts
+
+        The longest already-summarized prefix is reused and the turns after it
+        are excerpted. An LLM summary of the whole list is refreshed in the
+        background so the next turn finds it cached.
+        """
+        keys = self._prefix_keys(turns)
+        base, covered = "", 0
+        with self._lock:
+            for count in range(len(turns), 0, -1):
+                if keys[count - 1] in self._summaries:
+                    self._summaries.move_to_end(keys[count - 1])
+                    base, covered = self._summaries[keys[count - 1]], count
+                    break
+
+        excerpts = [excerpt(turn) for turn in turns[covered:]]
+        summary = "\n".join(([base] if base else []) + excerpts)
+
+        if covered < len(turns):
+            # The LLM gets the new turns in full (capped), not the excerpts
+            draft = "\n".join(
+                ([f"Summary so far:\n{base}"] if base else [])
+                + [truncate_to_tokens(format_turn(turn), TURN_MAX_TOKENS)[0] for turn in turns[covered:]]
+            )
+            self._schedule_refresh(keys[-1], draft)
+        return truncate_to_tokens(summary, SUMMARY_MAX_TOKENS)[0]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"summaries": len(self._summaries), "pending": len(self._pending)}
+
+    def _prefix_keys(self, turns: List[Dict]) -> List[str]:
+        # Chained hashes, so every prefix gets a key in one pass
+        keys, digest = [], b""
+        for turn in turns:
+            digest = hashlib.sha256(digest + format_turn(turn).encode('utf-8')).digest()
+            keys.append(digest.hex())
+        return keys
+
+    def _schedule_refresh(self, key: str, draft: str):
+        if not self.summarizer:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending[key] = loop.create_task(self._refresh(key, draft))
+
+    async def _refresh(self, key: str, draft: str):
+        try:
+            summary = await self.summarizer(draft, SUMMARY_MAX_TOKENS)
+            if summary:
+                with self._lock:
+                    self._summaries[key] = truncate_to_tokens(summary.strip(), SUMMARY_MAX_TOKENS)[0]
+                    self._summaries.move_to_end(key)
+                    while len(self._summaries) > self.cache_size:
+                        self._summaries.popitem(last=False)
+        except Exception as e:
+            print(f"Conversation summary failed: {e}")
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
@@ -0,0 +1,98 @@
+"""
+Rate Limiter Module for JobTracker
+Token-bucket limiting for Gemini API quotas (requests and tokens per minute)
+"""
+
+import time
+import threading
+from typing import Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for quota accounting (~4 characters per token)
+
+    Args:
+        text: Prompt or response text
+
+    Returns:
+        Estimated number of tokens
+    """
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Bucket holding up to `capacity` units, refilled continuously"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.available = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        elapsed = now - self.updated
+        self.available = min(self.capacity, self.available + elapsed * self.refill_per_second)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if available now)"""
+        deficit = amount - self.available
+        return max(0.0, deficit / self.refill_per_second)
+
+
+class RateLimiter:
+    """Thread-safe limiter sized from requests-per-minute and tokens-per-minute"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: Optional[int] = None):
+        """
+        Initialize rate limiter
+
+        Args:
+            requests_per_minute: Allowed API calls per minute
+            tokens_per_minute: Allowed input+output tokens per minute (None = unlimited)
+        """
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.tokens = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+            if tokens_per_minute else None
+        )
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0, timeout: Optional[float] = None) -> bool:
+        """
+        Block until one request (and `tokens` tokens) fit in the quota
+
+        Args:
+            tokens: Estimated tokens the request will use
+            timeout: Maximum seconds to wait (None = wait as long as needed)
+
+        Returns:
+            True if acquired, False if the timeout ran out first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if self.tokens:
+            # A single oversized request can never exceed a full bucket
+            tokens = min(tokens, self.tokens.capacity)
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.requests.refill(now)
+                wait = self.requests.wait_time(1)
+                if self.tokens:
+                    self.tokens.refill(now)
+                    wait = max(wait, self.tokens.wait_time(tokens))
+
+                if wait == 0:
+                    self.requests.available -= 1
+                    if self.tokens:
+                        self.tokens.available -= tokens
+                    return True
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
@@ -0,0 +1,325 @@
+"""
+Background Job Module for JobTracker
+Runs email syncs on a worker pool and tracks their progress
+
+With a job table wired in, every job is also a row there: the one-active-job-per-user
+rule is a unique index on it, and any worker process can answer a poll for any job.
+"""
+
+import os
+import json
+import uuid
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Callable, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCESS = "success"
+JOB_ERROR = "error"
+
+ACTIVE_STATES = {JOB_QUEUED, JOB_RUNNING}
+
+# Progress is written to the job table at most this often (status changes always are)
+SYNC_JOB_SAVE_INTERVAL = float(os.getenv("SYNC_JOB_SAVE_INTERVAL", "1"))
+# An active job row not written for this long belongs to a worker that died - it stops blocking new jobs
+SYNC_JOB_STALE_SECONDS = int(os.getenv("SYNC_JOB_STALE_SECONDS", "900"))
+# Finished job rows are deleted after this long
+SYNC_JOB_RETENTION_HOURS = int(os.getenv("SYNC_JOB_RETENTION_HOURS", "24"))
+
+# Progress counters a new email sync job starts from
+EMAIL_SYNC_PROGRESS = {
+    "emails_scanned": 0,
+    "emails_processed": 0,
+    "applications_added": 0,
+    "applications_updated": 0,
+    "errors": 0
+}
+
+
+class SyncJob:
+    """A single background sync job and its progress counters"""
+
+    def __init__(self, user_id: int, progress: Optional[Dict] = None):
+        self.job_id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.status = JOB_QUEUED
+        self.progress = dict(progress if progress is not None else EMAIL_SYNC_PROGRESS)
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self) -> Dict:
+        """Serialize job for API responses"""
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+    @classmethod
+    def from_record(cls, record) -> "SyncJob":
+        """Rebuild a job from its job table row (a job another worker process may be running)"""
+        job = cls.__new__(cls)
+        job.job_id = record.job_id
+        job.user_id = record.user_id
+        job.status = record.status
+        job.progress = json.loads(record.progress) if record.progress else {}
+        job.result = json.loads(record.result) if record.result else None
+        job.error = record.error
+        job.created_at = record.created_at
+        job.started_at = record.started_at
+        job.finished_at = record.finished_at
+        return job
+
+
+class SyncJobManager:
+    """Runs sync jobs off the event loop, one active job per user"""
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_finished_jobs: int = 100,
+        thread_name_prefix: str = "email-sync",
+        initial_progress: Optional[Dict] = None,
+        on_change: Optional[Callable[[SyncJob], None]] = None,
+        session_factory: Optional[Callable] = None,
+        SyncJobRecord=None,
+        kind: Optional[str] = None
+    ):
+        """
+        Initialize job manager
+
+        Args:
+            max_workers: Number of worker threads running syncs
+            max_finished_jobs: Finished jobs kept around for status polling
+            thread_name_prefix: Name prefix for the worker threads
+            initial_progress: Progress counters new jobs start from (email sync counters by default)
+            on_change: Called with the job whenever its status or progress changes (from any thread)
+            session_factory: Sync session factory for the job table (jobs live in this process only without one)
+            SyncJobRecord: Job table model
+            kind: Job kind stored on the rows, so managers can share the table (thread_name_prefix by default)
+        """
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=thread_name_prefix
+        )
+        self.max_finished_jobs = max_finished_jobs
+        self.initial_progress = initial_progress
+        self.on_change = on_change
+        self.session_factory = session_factory
+        self.SyncJobRecord = SyncJobRecord
+        self.kind = kind or thread_name_prefix
+        self._jobs: "OrderedDict[str, SyncJob]" = OrderedDict()
+        self._active_by_user: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, user_id: int, func: Callable, *args, **kwargs) -> Tuple[SyncJob, bool]:
+        """
+        Submit a sync for a user, or join the one already running
+
+        Args:
+            user_id: User the sync runs for
+            func: Callable doing the work; receives progress_callback as a keyword
+            *args, **kwargs: Passed through to func
+
+        Returns:
+            (job, created) - created is False if an active job was reused
+        """
+        with self._lock:
+            active_id = self._active_by_user.get(user_id)
+            if active_id and self._jobs[active_id].status in ACTIVE_STATES:
+                return self._jobs[active_id], False
+
+            job = SyncJob(user_id, self.initial_progress)
+            if self.session_factory:
+                # Another worker process may hold the user's active job - the unique index decides
+                active = self._insert(job)
+                if active:
+                    return active, False
+            self._jobs[job.job_id] = job
+            self._active_by_user[user_id] = job.job_id
+            self._prune()
+
+        self._notify(job)
+        self.executor.submit(self._run, job, func, args, kwargs)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[SyncJob]:
+        """Look up a job by ID"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job or not self.session_factory:
+            return job
+
+        db = self.session_factory()
+        try:
+            record = db.query(self.SyncJobRecord).filter_by(job_id=job_id, kind=self.kind).first()
+            return SyncJob.from_record(record) if record else None
+        finally:
+            db.close()
+
+    def get_active(self, user_id: int) -> Optional[SyncJob]:
+        """Get the queued or running job for a user, if any"""
+        with self._lock:
+            job = self._jobs.get(self._active_by_user.get(user_id, ""))
+        if job and job.status in ACTIVE_STATES:
+            return job
+        if not self.session_factory:
+            return None
+
+        db = self.session_factory()
+        try:
+            record = self._active_record(db, user_id)
+            return SyncJob.from_record(record) if record else None
+        finally:
+            db.close()
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting jobs and release worker threads"""
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job: SyncJob, func: Callable, args: tuple, kwargs: dict):
+        job.status = JOB_RUNNING
+        job.started_at = datetime.utcnow()
+        self._save(job)
+        self._notify(job)
+        last_saved = time.monotonic()
+
+        def progress_callback(counts: Dict):
+            nonlocal last_saved
+            # Swap in a new dict so readers never see a half-updated one
+            job.progress = {**job.progress, **counts}
+            if time.monotonic() - last_saved >= SYNC_JOB_SAVE_INTERVAL:
+                self._save(job)
+                last_saved = time.monotonic()
+            self._notify(job)
+
+        try:
+            job.result = func(*args, progress_callback=progress_callback, **kwargs)
+            job.status = JOB_SUCCESS
+        except Exception as e:
+            print(f"Sync job {job.job_id[:8]} failed: {e}")
+            job.error = str(e)
+            job.status = JOB_ERROR
+        finally:
+            job.finished_at = datetime.utcnow()
+            self._save(job)
+            with self._lock:
+                if self._active_by_user.get(job.user_id) == job.job_id:
+                    del self._active_by_user[job.user_id]
+            self._notify(job)
+
+    def _active_record(self, db, user_id: int):
+        # Rows not written since the stale cutoff are left behind by dead workers
+        SyncJobRecord = self.SyncJobRecord
+        return db.query(SyncJobRecord).filter(
+            SyncJobRecord.kind == self.kind,
+            SyncJobRecord.user_id == user_id,
+            SyncJobRecord.status.in_(ACTIVE_STATES),
+            SyncJobRecord.updated_at >= datetime.utcnow() - timedelta(seconds=SYNC_JOB_STALE_SECONDS)
+        ).first()
+
+    def _insert(self, job: SyncJob) -> Optional[SyncJob]:
+        """Write a new job row; returns the user's existing active job instead if there is one"""
+        SyncJobRecord = self.SyncJobRecord
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            # Release stale active rows so they stop holding the unique index, and drop old finished ones
+            db.query(SyncJobRecord).filter(
+                SyncJobRecord.kind == self.kind,
+                SyncJobRecord.user_id == job.user_id,
+                SyncJobRecord.status.in_(ACTIVE_STATES),
+                SyncJobRecord.updated_at < now - timedelta(seconds=SYNC_JOB_STALE_SECONDS)
+            ).update({"status": JOB_ERROR, "error": "Worker stopped", "finished_at": now}, synchronize_session=False)
+            db.query(SyncJobRecord).filter(
+                SyncJobRecord.kind == self.kind,
+                SyncJobRecord.status.notin_(ACTIVE_STATES),
+                SyncJobRecord.finished_at < now - timedelta(hours=SYNC_JOB_RETENTION_HOURS)
+            ).delete(synchronize_session=False)
+            db.add(SyncJobRecord(
+                job_id=job.job_id, kind=self.kind, user_id=job.user_id, status=job.status,
+                progress=json.dumps(job.progress), created_at=job.created_at, updated_at=now
+            ))
+            db.commit()
+            return None
+        except IntegrityError:
+            db.rollback()
+            record = self._active_record(db, job.user_id)
+            if record is None:
+                raise
+            return SyncJob.from_record(record)
+        finally:
+            db.close()
+
+    def _save(self, job: SyncJob):
+        # Best effort - a failed write leaves the row stale rather than failing the job
+        if not self.session_factory:
+            return
+        db = self.session_factory()
+        try:
+            db.query(self.SyncJobRecord).filter_by(job_id=job.job_id).update({
+                "status": job.status,
+                "progress": json.dumps(job.progress),
+                "result": json.dumps(job.result, default=str) if job.result is not None else None,
+                "error": job.error,
+                "started_at": job.started_at,
+                "finished_at": job.finished_at,
+                "updated_at": datetime.utcnow()
+            }, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Sync job {job.job_id[:8]} save failed: {e}")
+        finally:
+            db.close()
+
+    def _notify(self, job: SyncJob):
+        if self.on_change:
+            try:
+                self.on_change(job)
+            except Exception as e:
+                print(f"Sync job {job.job_id[:8]} change hook failed: {e}")
+
+    def _prune(self):
+        # Drop the oldest finished jobs beyond the retention limit (caller holds the lock)
+        finished = [job_id for job_id, job in self._jobs.items() if job.status not in ACTIVE_STATES]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+
+
+# Convenience function for easy import
+def create_sync_job_manager(max_workers: int = 2,
+                            on_change: Optional[Callable[[SyncJob], None]] = None,
+                            session_factory: Optional[Callable] = None,
+                            SyncJobRecord=None) -> SyncJobManager:
+    """
+    Create a SyncJobManager instance
+
+    Args:
+        max_workers: Number of worker threads running syncs
+        on_change: Called with the job whenever its status or progress changes
+        session_factory: Sync session factory for the job table
+        SyncJobRecord: Job table model
+
+    Returns:
+        SyncJobManager instance
+    """
+    return SyncJobManager(
+        max_workers=max_workers, on_change=on_change,
+        session_factory=session_factory, SyncJobRecord=SyncJobRecord
+    )
@@ -0,0 +1,220 @@
+"""
+Test configuration for JobTracker
+Points the app at a throwaway SQLite database before main is imported
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Set before main is imported - load_dotenv never overrides variables already in the environment
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='jobtracker-tests-'), 'test.db')}"
+os.environ["GEMINI_API_KEY"] = ""
+
+import email_sync
+from email_sync import EmailSyncService
+from main import app, async_engine, Base, engine, SessionLocal, Application, EmailSyncLog, EmailSyncState, EmailClassification
+from migrations import run_migrations
+
+
+@pytest.fixture
+def schema():
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+
+@pytest.fixture
+def db_session(schema):
+    """Session on the test database; every table is emptied afterwards"""
+    db = SessionLocal()
+    yield db
+    db.close()
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+
+@pytest.fixture
+def api(db_session):
+    """Run `scenario(client)` against the app on a fresh event loop; returns its result"""
+    def run(scenario):
+        async def main():
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+            try:
+                return await scenario(client)
+            finally:
+                await client.aclose()
+                # Pooled aiosqlite connections belong to this loop
+                await async_engine.dispose()
+        return asyncio.run(main())
+    return run
+
+
+class FakeResponse(dict):
+    """httplib2-style response carried by HttpError"""
+
+    def __init__(self, status: int):
+        super().__init__(status=str(status))
+        self.status = status
+        self.reason = "Fake error"
+
+
+def http_error(status: int):
+    return email_sync.HttpError(FakeResponse(status), b'{"error": {"message": "Fake error"}}')
+
+
+class FakeRequest:
+    def __init__(self, run):
+        self.run = run
+
+    def execute(self):
+        return self.run()
+
+
+class FakeBatch:
+    def __init__(self, callback):
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, request.execute(), None)
+            except Exception as e:
+                self.callback(request_id, None, e)
+
+
+class FakeGmail:
+    """
+    In-memory stand-in for the Gmail API client the sync uses
+
+    Messages list newest first in pages of page_size; tokens are "p<offset>".
+    Subjects look like "Acme | Engineer | Interview" (see sync_service).
+    """
+
+    def __init__(self, page_size: int = 2):
+        self.page_size = page_size
+        self.mailbox = {}            # message ID -> message resource
+        self.history_log = []        # (history_id, message_id), oldest first
+        self.history_id = 100
+        self.history_expired = False
+        self.rejected_tokens = set()
+        self.failing_ids = set()     # messages().get fails for these
+        self.list_calls = []         # pageToken of every messages().list call
+        self.get_calls = []          # message IDs fetched
+
+    def add(self, message_id: str, subject: str, sender: str = "careers@example.com"):
+        self.history_id += 1
+        self.mailbox[message_id] = {
+            "id": message_id,
+            "payload": {
+                "headers": [
+                    {"name": "Subject", "value": subject},
+                    {"name": "From", "value": sender},
+                    {"name": "Date", "value": "Mon, 5 Jan 2026 10:00:00 +0000"},
+                ],
+                "body": {"data": ""}
+            }
+        }
+        self.history_log.append((self.history_id, message_id))
+
+    # API surface used by EmailSyncService
+
+    def users(self):
+        return self
+
+    def getProfile(self, userId):
+        return FakeRequest(lambda: {"historyId": str(self.history_id)})
+
+    def messages(self):
+        return FakeMessages(self)
+
+    def history(self):
+        return FakeHistory(self)
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(callback)
+
+
+class FakeMessages:
+    def __init__(self, gmail: FakeGmail):
+        self.gmail = gmail
+
+    def list(self, userId, q, maxResults, pageToken=None):
+        def run():
+            self.gmail.list_calls.append(pageToken)
+            if pageToken in self.gmail.rejected_tokens:
+                raise http_error(400)
+            newest_first = [message_id for _, message_id in reversed(self.gmail.history_log)]
+            offset = int(pageToken[1:]) if pageToken else 0
+            page = newest_first[offset:offset + self.gmail.page_size]
+            result = {"messages": [{"id": message_id} for message_id in page]} if page else {}
+            if offset + self.gmail.page_size < len(newest_first):
+                result["nextPageToken"] = f"p{offset + self.gmail.page_size}"
+            return result
+        return FakeRequest(run)
+
+    def get(self, userId, id):
+        def run():
+            self.gmail.get_calls.append(id)
+            if id in self.gmail.failing_ids:
+                raise http_error(500)
+            return self.gmail.mailbox[id]
+        return FakeRequest(run)
+
+
+class FakeHistory:
+    def __init__(self, gmail: FakeGmail):
+        self.gmail = gmail
+
+    def list(self, userId, startHistoryId, historyTypes, labelId, pageToken=None):
+        def run():
+            if self.gmail.history_expired:
+                raise http_error(404)
+            added = [
+                {"messagesAdded": [{"message": {"id": message_id}}]}
+                for history_id, message_id in self.gmail.history_log if history_id > int(startHistoryId)
+            ]
+            return {"history": added, "historyId": str(self.gmail.history_id)}
+        return FakeRequest(run)
+
+
+def parse_test_subject(email_content: str, subject: str):
+    """Keyword parser stand-in: "Company | Position | Status" subjects are job mail"""
+    parts = [part.strip() for part in subject.split("|")]
+    if len(parts) != 3:
+        return None
+    return {"company_name": parts[0], "position": parts[1], "status": parts[2], "is_job_related": True}
+
+
+@pytest.fixture
+def gmail():
+    return FakeGmail()
+
+
+@pytest.fixture
+def sync_service(gmail):
+    service = EmailSyncService()
+    service.get_gmail_service = lambda: gmail
+    service.parse_email_with_keywords = parse_test_subject
+    return service
+
+
+@pytest.fixture
+def run_sync(sync_service, db_session):
+    """Run one sync for user 1 with every model wired in; keyword arguments pass through"""
+    def run(**kwargs):
+        return sync_service.sync_emails(
+            db_session=db_session, user_id=1, Application=Application, EmailSyncLog=EmailSyncLog,
+            EmailSyncState=EmailSyncState, EmailClassification=EmailClassification, **kwargs
+        )
+    return run
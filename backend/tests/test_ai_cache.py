@@ -0,0 +1,78 @@
+"""
+AI response cache tests - per-tool TTLs, LRU eviction and key normalization
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import ai_cache
+from ai_cache import ResponseCache, prompt_hash
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ai_cache, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_entries_expire_after_their_tools_ttl(clock):
+    cache = ResponseCache(10, {"company-research": 60, "interview-prep": 10})
+    cache.put("a", "company-research", ["Acme is"], tokens=5)
+    cache.put("b", "interview-prep", ["Practice"], tokens=5)
+
+    clock.now += 30
+    assert cache.get("a").chunks == ["Acme is"]
+    assert cache.get("b") is None
+
+    clock.now += 30
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResponseCache(2, {"company-research": 60})
+    cache.put("a", "company-research", ["A"], tokens=1)
+    cache.put("b", "company-research", ["B"], tokens=1)
+    cache.get("a")
+    cache.put("c", "company-research", ["C"], tokens=1)
+
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_uncached_tools_are_never_stored(clock):
+    cache = ResponseCache(10, {"company-research": 60, "cover-letter": 0})
+    cache.put("a", "cover-letter", ["Dear"], tokens=1)
+
+    assert not cache.cacheable("cover-letter") and not cache.cacheable("unknown")
+    assert cache.get("a") is None
+    assert not ResponseCache(0, {"company-research": 60}).cacheable("company-research")
+
+
+def test_hits_count_saved_tokens(clock):
+    cache = ResponseCache(10, {"company-research": 60})
+    cache.put("a", "company-research", ["A"], tokens=40)
+    cache.get("a")
+    cache.get("a")
+    cache.get("missing")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["saved_tokens"], stats["hit_rate"]) == (2, 1, 80, 0.667)
+
+
+def test_prompt_key_ignores_case_and_whitespace_but_not_tool_or_model():
+    key = prompt_hash("company-research", "gemini-pro", "Tell me about  Acme\n")
+    assert prompt_hash("company-research", "gemini-pro", "tell me about acme") == key
+    assert prompt_hash("interview-prep", "gemini-pro", "tell me about acme") != key
+    assert prompt_hash("company-research", "gemini-flash", "tell me about acme") != key
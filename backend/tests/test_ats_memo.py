@@ -0,0 +1,62 @@
+"""
+ATS memo tests - scores computed for one user's resume never answer another user's
+"""
+
+import asyncio
+import threading
+
+from ats_scoring import AtsScorer, resume_content_hash
+from main import AsyncSessionLocal, Resume, find_ats_result
+
+CONTENT = "Jane Doe - Python, SQL, 5 years backend engineering"
+
+
+def add_scored_resume(db, user_id, score):
+    content_hash = resume_content_hash(CONTENT)
+    db.add(Resume(
+        user_id=user_id, filename="resume.pdf", content=CONTENT, content_hash=content_hash,
+        ats_content_hash=content_hash, ats_score=score, ats_feedback="{}"
+    ))
+    db.commit()
+    return content_hash
+
+
+def test_memo_lookup_is_scoped_to_the_user(db_session):
+    content_hash = add_scored_resume(db_session, user_id=2, score=88)
+
+    async def lookup(user_id):
+        async with AsyncSessionLocal() as db:
+            return await find_ats_result(db, user_id, content_hash)
+
+    assert asyncio.run(lookup(1)) is None
+    assert asyncio.run(lookup(2)) == {"score": 88, "feedback": "{}"}
+
+
+class BlockingGemini:
+    """Gemini client stand-in whose calls wait until released"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.models = self
+
+    def generate_content(self, model, contents, config):
+        self.release.wait(5)
+        return type("Response", (), {"text": '{"score": 70, "feedback": "Solid"}'})()
+
+
+def test_identical_content_in_flight_is_shared_per_user_only():
+    gemini = BlockingGemini()
+    scorer = AtsScorer(gemini, max_workers=3)
+    content_hash = resume_content_hash(CONTENT)
+    try:
+        first = scorer.submit(1, content_hash, CONTENT)
+        same_user = scorer.submit(1, content_hash, CONTENT)
+        other_user = scorer.submit(2, content_hash, CONTENT)
+        gemini.release.set()
+
+        assert same_user is first
+        assert other_user is not first
+        other_user.result(5)
+        assert scorer.llm_calls == 2
+    finally:
+        scorer.shutdown(wait=True)
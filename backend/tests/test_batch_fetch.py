@@ -0,0 +1,84 @@
+"""
+Batched Gmail fetch tests - chunking, input order and per-message errors
+"""
+
+from conftest import FakeBatch
+
+
+class CountingGmail:
+    """Wraps a FakeGmail, recording the size of every batch request executed"""
+
+    def __init__(self, gmail, drop_ids=(), fail_batches=False):
+        self.gmail = gmail
+        self.drop_ids = set(drop_ids)
+        self.fail_batches = fail_batches
+        self.batch_sizes = []
+
+    def users(self):
+        return self.gmail
+
+    def new_batch_http_request(self, callback):
+        wrapper = self
+
+        class RecordingBatch(FakeBatch):
+            def execute(self):
+                wrapper.batch_sizes.append(len(self.requests))
+                if wrapper.fail_batches:
+                    raise ConnectionError("Network down")
+                # Gmail leaves requests it never answered out of the callback entirely
+                self.requests = [(request_id, request) for request_id, request in self.requests
+                                 if request_id not in wrapper.drop_ids]
+                super().execute()
+
+        return RecordingBatch(callback)
+
+
+def fill(gmail, count):
+    for i in range(count):
+        gmail.add(f"m{i}", f"Company{i} | Engineer | Applied")
+    return [f"m{i}" for i in range(count)]
+
+
+def test_messages_are_fetched_in_batches_in_input_order(gmail, sync_service):
+    ids = fill(gmail, 5)
+    service = CountingGmail(gmail)
+
+    results = list(sync_service.fetch_messages_batched(service, reversed(ids), batch_size=2))
+
+    assert service.batch_sizes == [2, 2, 1]
+    assert [message_id for message_id, _, _ in results] == list(reversed(ids))
+    assert all(message["id"] == message_id and error is None for message_id, message, error in results)
+
+
+def test_per_message_errors_are_reported_alongside_the_rest(gmail, sync_service):
+    ids = fill(gmail, 4)
+    gmail.failing_ids.add("m1")
+    service = CountingGmail(gmail, drop_ids={"m3"})
+
+    results = {message_id: (message, error) for message_id, message, error in
+               sync_service.fetch_messages_batched(service, ids, batch_size=10)}
+
+    assert service.batch_sizes == [4]
+    assert results["m0"][0]["id"] == "m0" and results["m2"][1] is None
+    assert results["m1"][0] is None and results["m1"][1].resp.status == 500
+    assert results["m3"][0] is None and "No response" in str(results["m3"][1])
+
+
+def test_failed_batch_reports_every_message_in_it(gmail, sync_service):
+    ids = fill(gmail, 3)
+    service = CountingGmail(gmail, fail_batches=True)
+
+    results = list(sync_service.fetch_messages_batched(service, ids, batch_size=2))
+
+    assert [message_id for message_id, _, _ in results] == ids
+    assert all(message is None and isinstance(error, ConnectionError) for _, message, error in results)
+
+
+def test_sync_fills_errors_for_failed_fetches_and_imports_the_rest(gmail, run_sync):
+    fill(gmail, 3)
+    gmail.failing_ids.add("m1")
+
+    result = run_sync(batch_size=2)
+
+    assert result["applications_added"] == 2
+    assert len(result["errors"]) == 1 and "m1" in result["errors"][0]
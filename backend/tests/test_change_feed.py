@@ -0,0 +1,73 @@
+"""
+Change feed tests - events without a transaction still reach other workers while listening
+"""
+
+import asyncio
+import json
+from contextlib import contextmanager
+from datetime import datetime
+
+from change_feed import ChangeBus, CHANGE_CHANNEL
+
+
+class FakeEngine:
+    """Records the pg_notify payloads sent through it"""
+
+    def __init__(self):
+        self.payloads = []
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, statement):
+        params = statement.compile().params
+        channel, payload = params.values()
+        assert channel == CHANGE_CHANNEL
+        self.payloads.append(payload)
+
+
+def test_broadcast_relays_event_body_through_pg_notify():
+    async def run():
+        sender, receiver = ChangeBus(), ChangeBus()
+        await sender.start()
+        await receiver.start()
+        sender.listening = receiver.listening = True
+        subscription, _ = receiver.subscribe(1)
+
+        fake = FakeEngine()
+        job = {"job_id": "abc", "status": "running", "started_at": datetime(2026, 1, 5)}
+        sender.broadcast(fake, 1, "sync_status", job)
+        await asyncio.sleep(0)
+        assert sender.published == 0
+
+        # Every worker's listener gets the notification, the sender's included
+        receiver._on_notify(None, 0, CHANGE_CHANNEL, fake.payloads[0])
+        return subscription.queue.get_nowait()
+
+    change = asyncio.run(run())
+    assert change.kind == "sync_status"
+    assert change.data == {"job_id": "abc", "status": "running", "started_at": "2026-01-05T00:00:00"}
+
+
+def test_broadcast_publishes_locally_without_a_listener():
+    async def run():
+        bus = ChangeBus()
+        await bus.start()
+        subscription, _ = bus.subscribe(1)
+        bus.broadcast(FakeEngine(), 1, "sync_status", {"job_id": "abc"})
+        await asyncio.sleep(0)
+        return subscription.queue.get_nowait()
+
+    assert asyncio.run(run()).data == {"job_id": "abc"}
+
+
+def test_collection_notifications_still_carry_their_version():
+    async def run():
+        bus = ChangeBus()
+        subscription, _ = bus.subscribe(1)
+        bus._on_notify(None, 0, CHANGE_CHANNEL, json.dumps({"user_id": 1, "collection": "tasks", "version": 4}))
+        return subscription.queue.get_nowait()
+
+    change = asyncio.run(run())
+    assert (change.kind, change.data) == ("tasks", {"version": 4})
@@ -0,0 +1,81 @@
+"""
+Delta sync tests - /api/changes reports rows changed since a cursor and tombstones for deletes
+"""
+
+
+async def seed(client):
+    """One application, task and resume; returns their IDs"""
+    application = (await client.post("/api/applications", json={"company": "Acme", "position": "Engineer"})).json()
+    task = (await client.post("/api/tasks", json={"title": "Prep", "category": "Skill Building"})).json()
+    resume = (await client.post("/api/resumes", json={"filename": "cv.txt", "content": "Python"})).json()
+    return application["id"], task["id"], resume["id"]
+
+
+def ids(section):
+    return sorted(row["id"] for row in section["changed"])
+
+
+def test_first_call_returns_everything(api):
+    async def scenario(client):
+        created = await seed(client)
+        return created, (await client.get("/api/changes")).json()
+
+    (application_id, task_id, resume_id), changes = api(scenario)
+
+    assert changes["full"] is True
+    assert (ids(changes["applications"]), ids(changes["tasks"]), ids(changes["resumes"])) == \
+        ([application_id], [task_id], [resume_id])
+
+
+def test_changes_since_cursor_include_updates_and_tombstones(api):
+    async def scenario(client):
+        application_id, task_id, resume_id = await seed(client)
+        cursor = (await client.get("/api/changes")).json()["cursor"]
+
+        await client.put(f"/api/applications/{application_id}", json={"status": "Interview"})
+        await client.delete(f"/api/tasks/{task_id}")
+        await client.delete(f"/api/resumes/{resume_id}")
+        added = (await client.post("/api/applications", json={"company": "Globex", "position": "Analyst"})).json()["id"]
+
+        changes = (await client.get("/api/changes", params={"since": cursor})).json()
+        unchanged = (await client.get("/api/changes", params={"since": changes["cursor"]})).json()
+        return (application_id, task_id, resume_id, added), cursor, changes, unchanged
+
+    (application_id, task_id, resume_id, added), cursor, changes, unchanged = api(scenario)
+
+    assert changes["full"] is False and changes["cursor"] > cursor
+    assert ids(changes["applications"]) == sorted([application_id, added])
+    assert changes["applications"]["deleted"] == []
+    assert changes["tasks"] == {"changed": [], "deleted": [task_id]}
+    assert changes["resumes"] == {"changed": [], "deleted": [resume_id]}
+    assert all(unchanged[name] == {"changed": [], "deleted": []} for name in ("applications", "tasks", "resumes"))
+
+
+def test_reset_leaves_tombstones_for_the_rows_it_deletes(api):
+    async def scenario(client):
+        created = await seed(client)
+        cursor = (await client.get("/api/changes")).json()["cursor"]
+        await client.post("/api/reset")
+        return created, (await client.get("/api/changes", params={"since": cursor})).json()
+
+    (application_id, task_id, _), changes = api(scenario)
+
+    assert changes["applications"]["deleted"] == [application_id]
+    assert changes["tasks"]["deleted"] == [task_id]
+    # Reset keeps resumes
+    assert changes["resumes"] == {"changed": [], "deleted": []}
+
+
+def test_unknown_cursor_falls_back_to_full_and_bad_collections_are_rejected(api):
+    async def scenario(client):
+        await seed(client)
+        future = (await client.get("/api/changes", params={"since": 10_000})).json()
+        subset = (await client.get("/api/changes", params={"collections": "tasks"})).json()
+        bad = await client.get("/api/changes", params={"collections": "tasks,users"})
+        return future, subset, bad
+
+    future, subset, bad = api(scenario)
+
+    assert future["full"] is True and len(future["applications"]["changed"]) == 1
+    assert set(subset) == {"cursor", "full", "tasks"}
+    assert bad.status_code == 400
@@ -0,0 +1,30 @@
+"""
+Dashboard tests - sections share a bounded number of sessions
+"""
+
+import asyncio
+
+import main
+
+
+def test_sections_hold_at_most_dashboard_concurrency_sessions(schema, monkeypatch):
+    running, peak = 0, 0
+
+    async def slow_section(db):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ok"
+
+    monkeypatch.setattr(main, "DASHBOARD_SECTIONS", {f"section{i}": slow_section for i in range(6)})
+
+    async def run():
+        # Semaphores bind to the loop that first waits on them - one per test run
+        monkeypatch.setattr(main, "dashboard_sessions", asyncio.Semaphore(2))
+        return await asyncio.gather(*[main.run_dashboard_section(name) for name in main.DASHBOARD_SECTIONS])
+
+    results = asyncio.run(run())
+    assert [result for result, _ in results] == ["ok"] * 6
+    assert peak == 2
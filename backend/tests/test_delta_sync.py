@@ -0,0 +1,102 @@
+"""
+Delta sync tests - historyId cursors, the expired-cursor fallback and
+per-message retries, against a fake Gmail service
+"""
+
+import json
+
+import email_sync
+from main import Application, EmailSyncState
+
+
+def sync_state(db_session):
+    db_session.expire_all()
+    return db_session.query(EmailSyncState).one()
+
+
+def imported(db_session):
+    return sorted(row.email_message_id for row in db_session.query(Application.email_message_id))
+
+
+def test_second_sync_fetches_only_new_mail(gmail, run_sync, db_session):
+    gmail.add("m1", "Acme | Engineer | Applied")
+    gmail.add("m2", "Globex | Analyst | Applied")
+    assert run_sync()["sync_mode"] == "full"
+    assert sync_state(db_session).history_id == "102"
+
+    gmail.add("m3", "Acme | Engineer | Interview")
+    gmail.add("m4", "Lunch on Friday?")
+    gmail.get_calls.clear()
+    gmail.list_calls.clear()
+    result = run_sync()
+
+    assert result["sync_mode"] == "delta"
+    assert gmail.list_calls == []
+    assert gmail.get_calls == ["m3", "m4"]
+    assert result["applications_updated"] == 1
+    assert sync_state(db_session).history_id == "104"
+
+
+def test_expired_cursor_falls_back_to_full_sync(gmail, run_sync, db_session):
+    gmail.add("m1", "Acme | Engineer | Applied")
+    run_sync()
+
+    gmail.add("m2", "Globex | Analyst | Applied")
+    gmail.history_expired = True
+    result = run_sync()
+
+    assert result["sync_mode"] == "full"
+    assert imported(db_session) == ["m1", "m2"]
+
+
+def test_failed_message_is_retried_without_holding_back_the_cursor(gmail, run_sync, db_session):
+    gmail.add("m1", "Acme | Engineer | Applied")
+    gmail.add("m2", "Globex | Analyst | Applied")
+    gmail.failing_ids.add("m2")
+
+    result = run_sync()
+
+    assert result["errors"]
+    state = sync_state(db_session)
+    assert state.history_id == "102"
+    assert json.loads(state.retry_message_ids) == {"m2": 1}
+    assert imported(db_session) == ["m1"]
+
+    gmail.failing_ids.clear()
+    gmail.add("m3", "Initech | Designer | Applied")
+    gmail.get_calls.clear()
+    result = run_sync()
+
+    assert result["sync_mode"] == "delta" and not result["errors"]
+    assert gmail.get_calls == ["m2", "m3"]
+    assert imported(db_session) == ["m1", "m2", "m3"]
+    assert sync_state(db_session).retry_message_ids is None
+
+
+def test_message_that_keeps_failing_is_given_up_on(gmail, run_sync, db_session, monkeypatch):
+    monkeypatch.setattr(email_sync, "GMAIL_MESSAGE_RETRIES", 2)
+    gmail.add("m1", "Acme | Engineer | Applied")
+    gmail.failing_ids.add("m1")
+
+    attempts = []
+    for _ in range(3):
+        run_sync()
+        attempts.append(sync_state(db_session).retry_message_ids)
+
+    assert attempts == ['{"m1": 1}', '{"m1": 2}', None]
+
+
+def test_imported_ids_are_looked_up_in_bounded_batches(gmail, run_sync, sync_service, db_session):
+    for i in range(7):
+        gmail.add(f"m{i}", f"Company {i} | Engineer | Applied")
+    run_sync()
+
+    lookups = []
+    lookup = sync_service.imported_message_ids
+    sync_service.imported_message_ids = lambda db, user_id, ids, model: lookups.append(len(ids)) or lookup(db, user_id, ids, model)
+    gmail.add("m7", "Company 7 | Engineer | Applied")
+    gmail.history_expired = True
+    run_sync(batch_size=3)
+
+    assert max(lookups) <= 3
+    assert imported(db_session) == sorted(f"m{i}" for i in range(8))
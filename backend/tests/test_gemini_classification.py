@@ -0,0 +1,113 @@
+"""
+Batched Gemini classification tests - label mapping, batching, caching and the rate limiter
+"""
+
+import json
+import re
+
+import pytest
+
+import email_sync
+from email_sync import EmailSyncService
+from rate_limiter import RateLimiter
+
+
+class FakeGemini:
+    """
+    Gemini client stand-in answering classification prompts
+
+    Emails whose subject starts with "Offer:" are job mail from Acme; the rest are not.
+    """
+
+    def __init__(self, fail=False, skip_labels=()):
+        self.fail = fail
+        self.skip_labels = set(skip_labels)
+        self.prompts = []
+        self.models = self
+
+    def generate_content(self, model, contents, config):
+        self.prompts.append(contents)
+        if self.fail:
+            raise RuntimeError("quota exceeded")
+        items = []
+        for label, subject in re.findall(r"\[(e\d+)\]\nSubject: (.*)", contents):
+            if label in self.skip_labels:
+                continue
+            if subject.startswith("Offer:"):
+                items.append({"id": label, "is_job_related": True, "company_name": "Acme",
+                              "position": subject[len("Offer:"):].strip(), "status": "Interview"})
+            else:
+                items.append({"id": label, "is_job_related": False})
+        return type("Response", (), {"text": json.dumps(items)})()
+
+
+def email(message_id, subject):
+    return {"id": message_id, "subject": subject, "body": "Hello"}
+
+
+@pytest.fixture
+def classifier():
+    service = EmailSyncService()
+    service.gemini_client = FakeGemini()
+    service.rate_limiter = RateLimiter(1000)
+    return service
+
+
+def test_one_request_classifies_several_emails_by_message_id(classifier):
+    results = classifier.classify_emails_with_gemini([
+        email("msg-a", "Offer: Engineer"), email("msg-b", "Newsletter"), email("msg-c", "Offer: Analyst")
+    ])
+
+    assert len(classifier.gemini_client.prompts) == 1
+    assert results == {
+        "msg-a": {"company_name": "Acme", "position": "Engineer", "status": "Interview", "is_job_related": True},
+        "msg-b": None,
+        "msg-c": {"company_name": "Acme", "position": "Analyst", "status": "Interview", "is_job_related": True},
+    }
+
+
+def test_emails_missing_from_the_reply_or_a_failed_request_are_left_out(classifier):
+    classifier.gemini_client = FakeGemini(skip_labels={"e1"})
+    assert set(classifier.classify_emails_with_gemini([email("a", "Offer: x"), email("b", "Offer: y")])) == {"a"}
+
+    classifier.gemini_client = FakeGemini(fail=True)
+    assert classifier.classify_emails_with_gemini([email("a", "Offer: x")]) == {}
+
+
+def test_sync_classifies_in_batches_and_reuses_cached_results(gmail, sync_service, run_sync, monkeypatch):
+    monkeypatch.setattr(email_sync, "GEMINI_CLASSIFY_BATCH_SIZE", 2)
+    sync_service.gemini_client = FakeGemini()
+    sync_service.rate_limiter = RateLimiter(1000)
+    gmail.add("m1", "Offer: Engineer")
+    for i in range(2, 6):
+        gmail.add(f"m{i}", f"Newsletter {i}")
+
+    result = run_sync(use_ai=True)
+
+    assert result["ai_calls_used"] == 3
+    assert result["applications_added"] == 1
+
+    # Negatives are never imported, so a full sync sees them again - from the cache this time
+    result = run_sync(use_ai=True, full_sync=True)
+    assert result["ai_calls_used"] == 0
+    assert result["ai_cache_hits"] == 4
+
+
+def test_unclassified_email_is_reported_and_retried(gmail, sync_service, run_sync):
+    sync_service.gemini_client = FakeGemini(fail=True)
+    gmail.add("m1", "Offer: Engineer")
+
+    result = run_sync(use_ai=True)
+
+    assert "AI classification failed" in result["errors"][0]
+    sync_service.gemini_client = FakeGemini()
+    assert run_sync(use_ai=True)["applications_added"] == 1
+
+
+def test_rate_limiter_holds_requests_and_tokens_to_the_quota():
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=1000)
+
+    assert limiter.acquire(tokens=800, timeout=0)
+    assert not limiter.acquire(tokens=300, timeout=0)     # tokens exhausted
+    assert limiter.acquire(tokens=100, timeout=0)
+    assert not limiter.acquire(tokens=0, timeout=0)       # requests exhausted
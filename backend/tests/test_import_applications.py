@@ -0,0 +1,101 @@
+"""
+Email import tests - EmailSyncService.import_applications against the test database
+"""
+
+from datetime import datetime
+
+from sqlalchemy import event
+
+from main import Application, engine
+from email_sync import EmailSyncService
+
+USER_ID = 1
+
+
+def parsed(message_id, company, position, status, day=1):
+    return (message_id, {"company_name": company, "position": position, "status": status}, datetime(2026, 1, day))
+
+
+def rows(db):
+    db.expire_all()
+    return [
+        (app.company, app.position, app.status, app.email_message_id, app.change_seq)
+        for app in db.query(Application).order_by(Application.id)
+    ]
+
+
+def add_manual(db, company, position, status="Applied"):
+    db.add(Application(user_id=USER_ID, company=company, position=position, status=status))
+    db.commit()
+
+
+def test_emails_about_one_application_collapse_to_newest_status(db_session):
+    added, updated = EmailSyncService().import_applications(db_session, USER_ID, [
+        parsed("m2", "Acme", "Engineer", "Interview", day=5),
+        parsed("m1", "Acme", "Engineer", "Applied", day=1),
+        parsed("m3", "Globex", "Analyst", "Applied", day=2),
+    ], Application, change_seq=4)
+    db_session.commit()
+
+    assert (added, updated) == (2, 0)
+    assert rows(db_session) == [
+        ("Acme", "Engineer", "Interview", "m2", 4),
+        ("Globex", "Analyst", "Applied", "m3", 4),
+    ]
+    assert db_session.query(Application).filter_by(company="Acme").one().date_applied == datetime(2026, 1, 1)
+
+
+def test_status_change_updates_imported_row(db_session):
+    service = EmailSyncService()
+    service.import_applications(db_session, USER_ID, [parsed("m1", "Acme", "Engineer", "Applied")], Application, 1)
+    db_session.commit()
+
+    assert service.import_applications(
+        db_session, USER_ID, [parsed("m2", "Acme", "Engineer", "Applied")], Application, 2
+    ) == (0, 0)
+    assert service.import_applications(
+        db_session, USER_ID, [parsed("m3", "Acme", "Engineer", "Offer")], Application, 3
+    ) == (0, 1)
+    db_session.commit()
+
+    assert rows(db_session) == [("Acme", "Engineer", "Offer", "m1", 3)]
+
+
+def test_manual_duplicates_are_allowed_and_the_oldest_is_updated(db_session):
+    add_manual(db_session, "Acme", "Engineer")
+    add_manual(db_session, "Acme", "Engineer", status="Rejected")
+
+    assert EmailSyncService().import_applications(
+        db_session, USER_ID, [parsed("m1", "Acme", "Engineer", "Interview")], Application, 7
+    ) == (0, 1)
+    db_session.commit()
+
+    assert rows(db_session) == [
+        ("Acme", "Engineer", "Interview", None, 7),
+        ("Acme", "Engineer", "Rejected", None, None),
+    ]
+
+
+def test_row_imported_concurrently_is_updated_not_duplicated(db_session):
+    # Another sync inserts the same pair between this import's lookup and its insert
+    raced = []
+
+    def concurrent_import(conn, cursor, statement, parameters, context, executemany):
+        if not raced and statement.lstrip().startswith("SELECT") and "FROM applications" in statement:
+            raced.append(statement)
+            with engine.begin() as other:
+                other.execute(Application.__table__.insert().values(
+                    user_id=USER_ID, company="Acme", position="Engineer", status="Applied",
+                    email_message_id="other", auto_imported=True
+                ))
+
+    event.listen(engine, "after_cursor_execute", concurrent_import)
+    try:
+        EmailSyncService().import_applications(
+            db_session, USER_ID, [parsed("m1", "Acme", "Engineer", "Interview")], Application, 9
+        )
+        db_session.commit()
+    finally:
+        event.remove(engine, "after_cursor_execute", concurrent_import)
+
+    assert rows(db_session) == [("Acme", "Engineer", "Interview", "other", 9)]
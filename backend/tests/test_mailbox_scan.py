@@ -0,0 +1,78 @@
+"""
+Mailbox scan tests - paging, resuming, restarting and stopping early, against a fake Gmail service
+"""
+
+from main import Application, EmailSyncState
+
+
+def add_job_mail(gmail, count, start=1):
+    for i in range(start, start + count):
+        gmail.add(f"m{i}", f"Company {i} | Engineer | Applied")
+
+
+def sync_state(db_session):
+    db_session.expire_all()
+    return db_session.query(EmailSyncState).one()
+
+
+def imported(db_session):
+    return sorted(row.email_message_id for row in db_session.query(Application.email_message_id))
+
+
+def test_scan_cut_short_resumes_where_it_stopped(gmail, run_sync, db_session):
+    add_job_mail(gmail, 5)
+
+    run_sync(max_pages=1)
+    state = sync_state(db_session)
+    assert (state.scan_page_token, state.history_id) == ("p2", None)
+
+    run_sync(max_pages=1)
+    run_sync(max_pages=1)
+
+    assert gmail.list_calls == [None, "p2", "p4"]
+    assert imported(db_session) == ["m1", "m2", "m3", "m4", "m5"]
+    state = sync_state(db_session)
+    # Finished - mail that arrived during the scan is replayed from where it began
+    assert (state.scan_page_token, state.scan_query, state.history_id) == (None, None, "105")
+
+
+def test_rejected_page_token_restarts_the_scan(gmail, run_sync, db_session):
+    add_job_mail(gmail, 3)
+    db_session.add(EmailSyncState(
+        user_id=1, scan_query="after:2026/01/01 stale", scan_page_token="expired", scan_history_id="50"
+    ))
+    db_session.commit()
+    gmail.rejected_tokens.add("expired")
+
+    result = run_sync()
+
+    assert result["success"]
+    assert gmail.list_calls == ["expired", None, "p2"]
+    assert imported(db_session) == ["m1", "m2", "m3"]
+    state = sync_state(db_session)
+    assert (state.scan_page_token, state.scan_query, state.scan_history_id) == (None, None, None)
+    assert state.history_id == "103"
+
+
+def test_full_scan_stops_at_mail_an_earlier_scan_covered(gmail, run_sync, db_session):
+    add_job_mail(gmail, 6)
+    run_sync()
+    assert sync_state(db_session).scan_covered_after is not None
+
+    add_job_mail(gmail, 1, start=7)
+    gmail.list_calls.clear()
+    run_sync(full_sync=True)
+
+    # m7 and m6 share the first page, and m6 was already imported
+    assert gmail.list_calls == [None]
+    assert imported(db_session) == ["m1", "m2", "m3", "m4", "m5", "m6", "m7"]
+
+
+def test_wider_window_pages_past_imported_mail(gmail, run_sync, db_session):
+    add_job_mail(gmail, 6)
+    run_sync(days_back=30)
+
+    gmail.list_calls.clear()
+    run_sync(days_back=90, full_sync=True)
+
+    assert gmail.list_calls == [None, "p2", "p4"]
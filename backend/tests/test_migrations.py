@@ -0,0 +1,100 @@
+"""
+Migration tests - run against a fresh SQLite database per test
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+import main
+import migrations
+from main import Base
+from migrations import MIGRATIONS, SUPERSEDED, HOT_QUERIES, run_migrations, explain_hot_queries
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def insert_application(conn, company, position, message_id=None):
+    conn.execute(
+        text("INSERT INTO applications (user_id, company, position, status, auto_imported, email_message_id) "
+             "VALUES (1, :company, :position, 'Applied', :imported, :message_id)"),
+        {"company": company, "position": position, "imported": message_id is not None, "message_id": message_id}
+    )
+
+
+def application_ids(conn, table="applications"):
+    return [row.id for row in conn.execute(text(f"SELECT id FROM {table} ORDER BY id"))]
+
+
+def test_run_migrations_applies_each_version_once(engine):
+    assert run_migrations(engine) == [version for version, _, _ in MIGRATIONS if version not in SUPERSEDED]
+    assert run_migrations(engine) == []
+
+    with engine.connect() as conn:
+        recorded = {row.version for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+    assert recorded == {version for version, _, _ in MIGRATIONS}
+
+
+def test_hot_queries_use_indexes(engine):
+    run_migrations(engine)
+
+    plans = explain_hot_queries(engine)
+
+    assert set(plans) == set(HOT_QUERIES)
+    for name, result in plans.items():
+        assert result["uses_index"], f"{name} is not served by an index:\n{result['plan']}"
+
+
+def test_manual_duplicates_kept_and_imported_duplicates_backed_up(engine):
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_applications_user_company_position_imported"))
+        insert_application(conn, "Acme", "Engineer")
+        insert_application(conn, "Acme", "Engineer")
+        insert_application(conn, "Globex", "Analyst", "m1")
+        insert_application(conn, "Globex", "Analyst", "m2")
+        insert_application(conn, "Initech", "Analyst", "m3")
+
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        assert application_ids(conn) == [1, 2, 3, 5]
+        assert application_ids(conn, "applications_duplicate_backup") == [4]
+
+
+def test_database_that_applied_migration_2_gets_the_scoped_index(engine, monkeypatch):
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_applications_user_company_position_imported"))
+    monkeypatch.setattr(migrations, "MIGRATIONS", [m for m in MIGRATIONS if m[0] < 9])
+    monkeypatch.setattr(migrations, "SUPERSEDED", {})
+    assert 2 in run_migrations(engine)
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS)
+    assert 9 in run_migrations(engine)
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("applications")}
+    assert "uq_applications_user_company_position" not in indexes
+    assert "uq_applications_user_company_position_imported" in indexes
+    with engine.begin() as conn:
+        insert_application(conn, "Acme", "Engineer")
+        insert_application(conn, "Acme", "Engineer")
+
+
+def test_startup_fails_when_migrations_fail(monkeypatch):
+    def broken_migrations(engine):
+        raise RuntimeError("migration 2 failed")
+
+    monkeypatch.setattr(main, "run_migrations", broken_migrations)
+
+    async def start():
+        async with main.lifespan(main.app):
+            pass
+
+    with pytest.raises(RuntimeError, match="migration 2 failed"):
+        asyncio.run(start())
@@ -0,0 +1,87 @@
+"""
+List pagination tests - keyset cursors on (created_at, id) and server-side filters
+"""
+
+from datetime import datetime
+
+from main import SessionLocal, Application, DEMO_USER_ID
+
+
+def add_applications(count, created_at=None, **fields):
+    """Insert applications directly - same created_at for all when given, to exercise the id tiebreak"""
+    db = SessionLocal()
+    try:
+        rows = [
+            Application(user_id=DEMO_USER_ID, company=f"Company{i}", position="Engineer",
+                        created_at=created_at, **fields)
+            for i in range(count)
+        ]
+        db.add_all(rows)
+        db.commit()
+        return [row.id for row in rows]
+    finally:
+        db.close()
+
+
+async def all_pages(client, url, **params):
+    """Follow X-Next-Cursor to the end; returns the pages of ids"""
+    pages, cursor = [], None
+    while True:
+        response = await client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        pages.append([row["id"] for row in response.json()])
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+
+
+def test_pages_cover_every_row_once_newest_first(api, db_session):
+    older = add_applications(3, created_at=datetime(2026, 1, 1))
+    tied = add_applications(4, created_at=datetime(2026, 1, 2))
+
+    async def scenario(client):
+        await client.get("/api/applications")  # creates the demo user
+        return await all_pages(client, "/api/applications", limit=3)
+
+    pages = api(scenario)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sum(pages, []) == list(reversed(tied)) + list(reversed(older))
+
+
+def test_filters_apply_before_paging(api, db_session):
+    add_applications(3, status="Interview")
+    add_applications(2, status="Applied")
+    add_applications(2, status="Interview", auto_imported=True)
+
+    async def scenario(client):
+        interviews = await all_pages(client, "/api/applications", status="Interview", auto_imported="false", limit=2)
+        prefix = (await client.get("/api/applications", params={"company": "company1"})).json()
+        wildcard = (await client.get("/api/applications", params={"company": "%"})).json()
+        return interviews, prefix, wildcard
+
+    interviews, prefix, wildcard = api(scenario)
+
+    assert [len(page) for page in interviews] == [2, 1]
+    assert {row["company"] for row in prefix} == {"Company1"}
+    assert wildcard == []
+
+
+def test_bad_cursor_is_rejected(api, db_session):
+    async def scenario(client):
+        return [
+            (await client.get("/api/applications", params={"cursor": cursor})).status_code
+            for cursor in ["not-a-cursor", "bm90fGEgY3Vyc29y"]
+        ] + [(await client.get("/api/tasks", params={"cursor": "???"})).status_code]
+
+    assert api(scenario) == [400, 400, 400]
+
+
+def test_page_size_is_bounded(api, db_session):
+    async def scenario(client):
+        return [
+            (await client.get("/api/applications", params={"limit": limit})).status_code
+            for limit in [0, 201]
+        ]
+
+    assert api(scenario) == [422, 422]
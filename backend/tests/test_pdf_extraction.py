@@ -0,0 +1,126 @@
+"""
+PDF extraction tests - upload spooling and size limit, page cap, failed pages and the text cache
+"""
+
+import io
+import os
+import asyncio
+import hashlib
+
+import PyPDF2
+import pytest
+
+import pdf_extraction
+from pdf_extraction import PdfTextExtractor, UploadTooLarge, extract_page_range, spool_upload
+
+
+def make_pdf(page_texts):
+    """Minimal PDF with one line of Helvetica text per page"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {len(objects)} 0 R "
+                       f"/Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+class FakeUpload:
+    """UploadFile stand-in read in chunks"""
+
+    def __init__(self, data: bytes):
+        self.stream = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self.stream.read(size)
+
+
+def spool(data: bytes, **kwargs):
+    return asyncio.run(spool_upload(FakeUpload(data), **kwargs))
+
+
+def test_small_uploads_stay_in_memory_and_large_ones_spool_to_disk(monkeypatch):
+    monkeypatch.setattr(pdf_extraction, "SPOOL_THRESHOLD_BYTES", 100)
+    monkeypatch.setattr(pdf_extraction, "UPLOAD_CHUNK_BYTES", 64)
+
+    small = spool(b"x" * 100)
+    assert small.path is None and small.source == b"x" * 100
+
+    data = bytes(range(256)) * 2
+    large = spool(data)
+    try:
+        assert os.path.exists(large.path)
+        assert large.read_bytes() == data and large.size == len(data)
+        assert large.content_hash == hashlib.sha256(data).hexdigest()
+    finally:
+        large.cleanup()
+    assert not os.path.exists(large.path)
+
+
+def test_upload_over_the_limit_is_rejected_and_its_temp_file_removed(monkeypatch):
+    monkeypatch.setattr(pdf_extraction, "SPOOL_THRESHOLD_BYTES", 10)
+    created = []
+    real_temp_file = pdf_extraction.tempfile.NamedTemporaryFile
+
+    def tracking_temp_file(**kwargs):
+        handle = real_temp_file(**kwargs)
+        created.append(handle.name)
+        return handle
+
+    monkeypatch.setattr(pdf_extraction.tempfile, "NamedTemporaryFile", tracking_temp_file)
+
+    with pytest.raises(UploadTooLarge):
+        spool(b"x" * 200_000, max_bytes=100_000)
+    assert created and not any(os.path.exists(path) for path in created)
+
+
+def test_page_cap_truncates_long_documents():
+    extractor = PdfTextExtractor(max_workers=1, max_pages=3)
+    try:
+        result = asyncio.run(extractor.extract(make_pdf([f"Page {i}" for i in range(1, 6)])))
+    finally:
+        extractor.shutdown()
+
+    assert result["text"] == "Page 1\nPage 2\nPage 3"
+    assert (result["pages"], result["pages_extracted"], result["truncated"]) == (5, 3, True)
+
+
+def test_failed_page_is_reported_without_losing_the_rest(monkeypatch):
+    real_extract = PyPDF2.PageObject.extract_text
+
+    def extract_text(page, *args, **kwargs):
+        text = real_extract(page, *args, **kwargs)
+        if text == "Broken":
+            raise ValueError("Bad content stream")
+        return text
+
+    monkeypatch.setattr(PyPDF2.PageObject, "extract_text", extract_text)
+
+    pages = extract_page_range(make_pdf(["Fine", "Broken", "Also fine"]), 0, 3, page_timeout=1)
+
+    assert pages == [(0, "Fine"), (1, None), (2, "Also fine")]
+
+
+def test_text_cache_is_bounded_lru():
+    extractor = PdfTextExtractor(cache_size=2)
+    extractor.remember("a", {"text": "A"})
+    extractor.remember("b", {"text": "B"})
+    extractor.cached("a")
+    extractor.remember("c", {"text": "C"})
+
+    assert extractor.cached("b") is None
+    assert extractor.cached("a") == {"text": "A"} and extractor.cached("c") == {"text": "C"}
+    assert extractor.stats()["entries"] == 2
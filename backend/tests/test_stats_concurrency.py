@@ -0,0 +1,126 @@
+"""
+Stats concurrency test - toggles and deletes tasks from many concurrent
+clients, then checks the user_stats counters still match the tasks and
+achievements tables
+"""
+
+import random
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+import main
+from main import app, async_engine, SessionLocal, Task, UserAchievement, ACHIEVEMENTS, DEMO_USER_ID
+
+NUM_TASKS = 20
+WORKERS = 16
+TOGGLES = 200
+BUSY_TIMEOUT_MS = 60000
+
+
+def configure_connection(dbapi_connection, connection_record):
+    # Let the begin hook issue BEGIN instead of the driver, and wait out a long queue of writers
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def take_write_lock(conn):
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+@pytest.fixture
+def queued_writers():
+    """
+    Make concurrent API transactions wait for each other instead of failing
+
+    SQLite has no row locks: two deferred transactions that read and then
+    write deadlock, and one fails with "database is locked" straight away.
+    Taking the write lock at BEGIN queues them like PostgreSQL row locks do,
+    with a busy timeout long enough that no writer starves in the queue.
+    """
+    sync_engine = async_engine.sync_engine
+    event.listen(sync_engine, "connect", configure_connection)
+    event.listen(sync_engine, "begin", take_write_lock)
+    yield
+    event.remove(sync_engine, "connect", configure_connection)
+    event.remove(sync_engine, "begin", take_write_lock)
+
+
+def expected_counters() -> dict:
+    """Counters recomputed from the source tables"""
+    db = SessionLocal()
+    try:
+        tasks = db.query(Task).filter(Task.user_id == DEMO_USER_ID).all()
+        achievements = [
+            row.achievement_id for row in
+            db.query(UserAchievement.achievement_id).filter(UserAchievement.user_id == DEMO_USER_ID)
+        ]
+    finally:
+        db.close()
+
+    completed = [task for task in tasks if task.completed]
+    return {
+        "total_points": sum(task.points for task in completed) + sum(ACHIEVEMENTS[a]["points"] for a in achievements),
+        "total_tasks": len(tasks),
+        "completed_tasks": len(completed),
+        "achievements_count": len(achievements),
+        "achievement_ids": achievements
+    }
+
+
+async def race_task_updates(seed: int):
+    """Send duplicate bursts of toggles, then racing deletes; returns (statuses, final stats)"""
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    try:
+        await client.post("/api/reset")
+        main.unlocked_achievements_cache.clear()
+
+        task_ids = [
+            (await client.post("/api/tasks", json={"title": f"Task {i}", "category": "Skill Building"})).json()["id"]
+            for i in range(NUM_TASKS)
+        ]
+        # First read recounts a freshly created stats row - get it out of the way before the race
+        await client.get("/api/stats")
+
+        rng = random.Random(seed)
+        # Mostly completes, sent in duplicate bursts to mimic double clicks from several tabs
+        operations = [(rng.choice(task_ids), rng.random() < 0.7) for _ in range(TOGGLES)]
+        operations = [op for op in operations for _ in range(2)]
+        slots = asyncio.Semaphore(WORKERS)
+
+        async def send(method: str, url: str, **kwargs) -> int:
+            async with slots:
+                return (await client.request(method, url, **kwargs)).status_code
+
+        statuses = await asyncio.gather(*[
+            send("PUT", f"/api/tasks/{task_id}", json={"completed": completed})
+            for task_id, completed in operations
+        ])
+
+        # Deletes race too - half the tasks, each deleted twice (the loser gets a 404)
+        doomed = [task_id for task_id in task_ids[::2] for _ in range(2)]
+        statuses += [
+            status for status in
+            await asyncio.gather(*[send("DELETE", f"/api/tasks/{task_id}") for task_id in doomed])
+            if status != 404
+        ]
+
+        return statuses, (await client.get("/api/stats")).json()
+    finally:
+        await client.aclose()
+        await async_engine.dispose()
+
+
+@pytest.mark.parametrize("seed", [7, 11])
+def test_stats_counters_survive_concurrent_updates(schema, queued_writers, seed):
+    statuses, stats = asyncio.run(race_task_updates(seed))
+    expected = expected_counters()
+
+    assert all(status == 200 for status in statuses)
+    assert len(expected["achievement_ids"]) == len(set(expected["achievement_ids"])), "duplicate achievement rows"
+    for key in ("total_points", "total_tasks", "completed_tasks", "achievements_count"):
+        assert stats[key] == expected[key], key
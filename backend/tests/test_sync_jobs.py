@@ -0,0 +1,78 @@
+"""
+Sync job tests - managers in different worker processes share the sync_jobs table
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import sync_jobs
+from main import SessionLocal, SyncJobRecord
+from sync_jobs import SyncJobManager, JOB_SUCCESS, JOB_ERROR
+
+USER_ID = 1
+
+
+@pytest.fixture
+def managers(db_session):
+    """Two managers on one table, standing in for two uvicorn workers"""
+    pair = [SyncJobManager(max_workers=1, session_factory=SessionLocal, SyncJobRecord=SyncJobRecord) for _ in range(2)]
+    yield pair
+    for manager in pair:
+        manager.shutdown(wait=True)
+
+
+def blocking_job():
+    release = threading.Event()
+
+    def run(progress_callback=None):
+        progress_callback({"emails_scanned": 3})
+        release.wait(5)
+        return {"applications_added": 1}
+    return run, release
+
+
+def test_second_worker_joins_the_running_job(managers):
+    first, second = managers
+    run, release = blocking_job()
+
+    job, created = first.submit(USER_ID, run)
+    joined, joined_created = second.submit(USER_ID, run)
+    active = second.get_active(USER_ID)
+    release.set()
+
+    assert created and not joined_created
+    assert joined.job_id == job.job_id
+    assert active.job_id == job.job_id
+
+
+def test_any_worker_reports_a_finished_job(managers):
+    first, second = managers
+    run, release = blocking_job()
+    release.set()
+
+    job, _ = first.submit(USER_ID, run)
+    first.shutdown(wait=True)
+
+    polled = second.get(job.job_id)
+    assert polled.status == JOB_SUCCESS
+    assert polled.result == {"applications_added": 1}
+    assert polled.progress["emails_scanned"] == 3
+    assert second.get_active(USER_ID) is None
+
+
+def test_stale_job_of_a_dead_worker_stops_blocking(managers, db_session):
+    first, second = managers
+    run, release = blocking_job()
+    release.set()
+    db_session.add(SyncJobRecord(
+        job_id="dead", kind=first.kind, user_id=USER_ID, status="running",
+        updated_at=datetime.utcnow() - timedelta(seconds=sync_jobs.SYNC_JOB_STALE_SECONDS + 1)
+    ))
+    db_session.commit()
+
+    job, created = second.submit(USER_ID, run)
+
+    assert created and job.job_id != "dead"
+    assert second.get("dead").status == JOB_ERROR
@@ -0,0 +1,39 @@
+"""
+Text Compression Module for JobTracker
+Gzip for large text stored in plain string columns
+"""
+
+import gzip
+import base64
+from typing import Optional
+
+# Marks a stored value as gzipped; plain values never start with it in practice
+GZIP_PREFIX = "gzip+b64:"
+
+
+def compress_text(text: str) -> str:
+    """
+    Gzip text and encode it so it still fits a text column
+
+    Args:
+        text: Text to store
+
+    Returns:
+        Prefixed base64 of the gzipped UTF-8 bytes
+    """
+    return GZIP_PREFIX + base64.b64encode(gzip.compress(text.encode('utf-8'))).decode('ascii')
+
+
+def decompress_text(value: Optional[str]) -> Optional[str]:
+    """
+    Undo compress_text; values stored uncompressed are returned unchanged
+
+    Args:
+        value: Stored column value
+
+    Returns:
+        Original text
+    """
+    if value is None or not value.startswith(GZIP_PREFIX):
+        return value
+    return gzip.decompress(base64.b64decode(value[len(GZIP_PREFIX):])).decode('utf-8')
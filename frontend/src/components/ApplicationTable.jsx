@@ -9,7 +9,8 @@ const ApplicationsTable = () => {
     loading, 
     updateApplication,
     deleteApplication,
-    fetchApplications
+    fetchApplications,
+    waitForSyncJob
   } = useApplications();
 
   // Email sync states
@@ -56,7 +57,9 @@ const API_BASE_URL = import.meta.env.VITE_API_URL;
       const data = await response.json();
       
       if (response.ok) {
-        setSyncResult(data);
+        // Sync runs in the background - wait for the job to finish
+        const result = await waitForSyncJob(data);
+        setSyncResult(result);
         // Refresh applications list from context
         await fetchApplications();
         await fetchSyncStatus();
@@ -345,7 +345,7 @@ SKILLS
                   )}
                   
                   <p className="text-sm text-gray-600 mt-2">
-                    {resume.content.substring(0, 150)}...
+                    {resume.content_preview}{resume.content_length > resume.content_preview?.length && '...'}
                   </p>
                 </div>
 
@@ -1,4 +1,4 @@
-import React, { createContext, useContext, useState, useEffect, useCallback } from 'react';
+import React, { createContext, useContext, useState, useEffect, useCallback, useRef } from 'react';
 
 export const APPLICATION_STATUSES = [
   'Applied',
@@ -9,6 +9,9 @@ export const APPLICATION_STATUSES = [
 ];
 const ApplicationContext = createContext();
 
+// Same order as the list endpoint: newest first, ties by ID
+const newestFirst = (a, b) => b.created_at.localeCompare(a.created_at) || b.id - a.id;
+
 export const useApplications = () => {
   const context = useContext(ApplicationContext);
   if (!context) {
@@ -23,28 +26,96 @@ export const ApplicationProvider = ({ children }) => {
   const [error, setError] = useState(null);
   const [lastSync, setLastSync] = useState(null);
   const [syncing, setSyncing] = useState(false);
+  // Cursor from /api/changes - null until the first full load
+  const changeCursor = useRef(null);
 
 const API_BASE_URL = import.meta.env.VITE_API_URL;
 
+  // Follow keyset pagination cursors from `cursor` (the first page if null) until every page is loaded
+  const fetchApplicationPages = useCallback(async (cursor = null) => {
+    const data = [];
+    
+    do {
+      const params = new URLSearchParams({ limit: '200' });
+      if (cursor) params.set('cursor', cursor);
+      
+      const response = await fetch(`${API_BASE_URL}/api/applications?${params}`);
+      if (!response.ok) throw new Error('Failed to fetch applications');
+      
+      data.push(...(await response.json()));
+      cursor = response.headers.get('X-Next-Cursor');
+    } while (cursor);
+    
+    return data;
+  }, [API_BASE_URL]);
+
   // Fetch all applications
   const fetchApplications = useCallback(async () => {
     setLoading(true);
     setError(null);
     
     try {
-      const response = await fetch(`${API_BASE_URL}/api/applications`);
-      if (!response.ok) throw new Error('Failed to fetch applications');
-      
-      const data = await response.json();
-      setApplications(data);
+      setApplications(await fetchApplicationPages());
     } catch (err) {
       setError(err.message);
       console.error('Error fetching applications:', err);
     } finally {
       setLoading(false);
     }
+  }, [fetchApplicationPages]);
+
+  // Bring applications up to date - only what changed since the last call once a cursor exists
+  const syncApplications = useCallback(async () => {
+    try {
+      const params = new URLSearchParams({ collections: 'applications' });
+      if (changeCursor.current !== null) params.set('since', changeCursor.current);
+      
+      const response = await fetch(`${API_BASE_URL}/api/changes?${params}`);
+      if (!response.ok) throw new Error('Failed to fetch application changes');
+      
+      const changes = await response.json();
+      const { changed, deleted } = changes.applications;
+      changeCursor.current = changes.cursor;
+      
+      if (changes.full) {
+        setApplications([...changed].sort(newestFirst));
+      } else if (changed.length || deleted.length) {
+        setApplications(prev => {
+          const replaced = new Set([...deleted, ...changed.map(app => app.id)]);
+          return [...changed, ...prev.filter(app => !replaced.has(app.id))].sort(newestFirst);
+        });
+      }
+    } catch (err) {
+      setError(err.message);
+      console.error('Error syncing applications:', err);
+    }
   }, [API_BASE_URL]);
 
+  // First load - applications, sync status and the change cursor in one request
+  const loadDashboard = useCallback(async () => {
+    setLoading(true);
+    setError(null);
+    
+    try {
+      const response = await fetch(`${API_BASE_URL}/api/dashboard?sections=applications,sync_status`);
+      if (!response.ok) throw new Error('Failed to load dashboard');
+      
+      const data = await response.json();
+      const { items, next_cursor } = data.applications;
+      changeCursor.current = data.change_cursor;
+      setLastSync(data.sync_status);
+      
+      // The dashboard returns the first page - the rest continue from its cursor
+      const rest = next_cursor ? await fetchApplicationPages(next_cursor) : [];
+      setApplications([...items, ...rest]);
+    } catch (err) {
+      setError(err.message);
+      console.error('Error loading dashboard:', err);
+    } finally {
+      setLoading(false);
+    }
+  }, [API_BASE_URL, fetchApplicationPages]);
+
   // Fetch last sync status
   const fetchSyncStatus = useCallback(async () => {
     try {
@@ -145,6 +216,26 @@ const API_BASE_URL = import.meta.env.VITE_API_URL;
     }
   };
 
+  // Poll a background sync job until it finishes
+  const waitForSyncJob = useCallback(async (job) => {
+    let current = job;
+    
+    while (current.status === 'queued' || current.status === 'running') {
+      await new Promise(resolve => setTimeout(resolve, 1500));
+      
+      const response = await fetch(`${API_BASE_URL}/api/email/sync/jobs/${current.job_id}`);
+      if (!response.ok) throw new Error('Failed to fetch sync job status');
+      
+      current = await response.json();
+    }
+    
+    if (current.status === 'error') {
+      throw new Error(current.error || 'Email sync failed');
+    }
+    
+    return current.result;
+  }, [API_BASE_URL]);
+
   // Sync emails and update applications dynamically
   const syncEmails = async (daysBack = 30, useAI = false) => {
     setSyncing(true);
@@ -167,10 +258,12 @@ const API_BASE_URL = import.meta.env.VITE_API_URL;
         throw new Error(errorData.detail || 'Email sync failed');
       }
       
-      const result = await response.json();
+      // Sync runs in the background - wait for the job to finish
+      const job = await response.json();
+      const result = await waitForSyncJob(job);
       
       // IMPORTANT: Refresh applications to get updates
-      await fetchApplications();
+      await syncApplications();
       await fetchSyncStatus();
       
       return result;
@@ -224,19 +317,37 @@ const API_BASE_URL = import.meta.env.VITE_API_URL;
 
   // Initial fetch
   useEffect(() => {
-    fetchApplications();
-    fetchSyncStatus();
-  }, [fetchApplications, fetchSyncStatus]);
+    loadDashboard();
+  }, [loadDashboard]);
 
-  // Auto-refresh every 5 minutes (optional)
+  // Live updates - the server pushes changes over SSE instead of being polled
   useEffect(() => {
-    const interval = setInterval(() => {
-      fetchApplications();
+    if (typeof EventSource === 'undefined') {
+      // Auto-refresh every 5 minutes where SSE isn't available
+      const interval = setInterval(() => {
+        syncApplications();
+        fetchSyncStatus();
+      }, 5 * 60 * 1000);
+
+      return () => clearInterval(interval);
+    }
+
+    // EventSource reconnects by itself, sending Last-Event-ID so missed changes are replayed
+    const events = new EventSource(`${API_BASE_URL}/api/events`);
+    const refreshAll = () => {
+      // Events were lost - start over from a full load
+      changeCursor.current = null;
+      syncApplications();
       fetchSyncStatus();
-    }, 5 * 60 * 1000); // 5 minutes
+    };
+
+    events.addEventListener('applications', syncApplications);
+    events.addEventListener('sync_logs', fetchSyncStatus);
+    events.addEventListener('sync_status', fetchSyncStatus);
+    events.addEventListener('resync', refreshAll);
 
-    return () => clearInterval(interval);
-  }, [fetchApplications, fetchSyncStatus]);
+    return () => events.close();
+  }, [API_BASE_URL, syncApplications, fetchSyncStatus]);
 
   const value = {
     // State
@@ -248,12 +359,14 @@ const API_BASE_URL = import.meta.env.VITE_API_URL;
     
     // CRUD operations
     fetchApplications,
+    syncApplications,
     createApplication,
     updateApplication,
     deleteApplication,
     
     // Email sync
     syncEmails,
+    waitForSyncJob,
     fetchSyncStatus,
     
     // Helpers
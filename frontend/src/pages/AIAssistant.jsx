@@ -9,6 +9,7 @@ const AIAssistant = () => {
   const [aiStatus, setAiStatus] = useState({ available: false, message: '' });
   const [activeResume, setActiveResume] = useState(null);
   const [loadingResume, setLoadingResume] = useState(false);
+  const [sessionId, setSessionId] = useState(null);
   const messagesEndRef = useRef(null);
 
 const API_BASE_URL = import.meta.env.VITE_API_URL;
@@ -133,21 +134,27 @@ const API_BASE_URL = import.meta.env.VITE_API_URL;
     setMessages(prev => [...prev, { role: 'assistant', content: '' }]);
 
     try {
-      const response = await fetch(`${API_BASE_URL}/api/ai/chat`, {
+      // The server keeps the conversation, so later turns only send the new message
+      const sendMessage = (session) => fetch(`${API_BASE_URL}/api/ai/chat`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({
-          message: input,
-          tool_id: selectedTool.id,
-          conversation_history: messages
-        })
+        body: JSON.stringify(session
+          ? { message: input, tool_id: selectedTool.id, session_id: session }
+          : { message: input, tool_id: selectedTool.id, conversation_history: messages })
       });
 
+      let response = await sendMessage(sessionId);
+      if (response.status === 410) {
+        // Session expired on the server - start a new one from the local history
+        response = await sendMessage(null);
+      }
+
       if (!response.ok) {
         throw new Error(`HTTP error! status: ${response.status}`);
       }
+      setSessionId(response.headers.get('X-Chat-Session'));
 
       // Handle streaming response
       const reader = response.body.getReader();
@@ -222,6 +229,10 @@ const API_BASE_URL = import.meta.env.VITE_API_URL;
   };
 
   const handleBackToTools = () => {
+    if (sessionId) {
+      fetch(`${API_BASE_URL}/api/ai/sessions/${sessionId}`, { method: 'DELETE' }).catch(() => {});
+      setSessionId(null);
+    }
     setSelectedTool(null);
     setMessages([]);
     setInput('');